@@ -1,60 +1,548 @@
-import json
+import asyncio
+import contextlib
+import functools
+import threading
+import httpx
+from google.auth.transport.requests import Request
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Tuple, Callable, Optional
 from datetime import datetime
 
+def _doc_len(text: str) -> int:
+    """Length of text in Docs index units (UTF-16 code units)"""
+    return len(text.encode("utf-16-le")) // 2
+
+@functools.lru_cache(maxsize=4)
+def _build_service(service_account_file: str, scopes: Tuple[str, ...]):
+    """Build the Docs service once per credentials file and scope set"""
+    creds = Credentials.from_service_account_file(
+        service_account_file, 
+        scopes=list(scopes)
+    )
+    # The discovery doc bundled with google-api-python-client is used, so
+    # building the service makes no network call; the authorized http
+    # refreshes the token itself when it expires
+    service = build(
+        "docs", "v1",
+        credentials=creds,
+        static_discovery=True,
+        cache_discovery=False
+    )
+    return service, creds
+
+class _ContentBuilder:
+    """Accumulates entry text and header ranges (in Docs index units)"""
+    
+    def __init__(self):
+        self.parts: List[str] = []
+        self.headers: List[Dict] = []
+        self.offset = 0
+    
+    def add(self, text: str):
+        self.parts.append(text)
+        self.offset += _doc_len(text)
+    
+    def add_header(self, label: str, prefix: str = "\n"):
+        """Add a header line and record the range of its label"""
+        start = self.offset + _doc_len(prefix)
+        self.headers.append({"start": start, "end": start + _doc_len(label)})
+        self.add(prefix + label + "\n")
+    
+    def build(self) -> Dict:
+        return {"text": "".join(self.parts), "headers": self.headers}
+
+def _is_revision_conflict(status: int, content) -> bool:
+    """Whether batchUpdate rejected writeControl.requiredRevisionId as stale"""
+    if status != 400:
+        return False
+    text = content.decode("utf-8", "replace") if isinstance(content, bytes) else str(content)
+    return "FAILED_PRECONDITION" in text or "revision" in text.lower()
+
 class DocsAgent:
     """Writes validated, minimal documentation to Google Docs"""
     
+    # Shared by every style request; the client only serializes them
+    _TITLE_STYLE = {"bold": True, "fontSize": {"magnitude": 18, "unit": "pt"}}
+    _HEADER_STYLE = {"bold": True, "fontSize": {"magnitude": 12, "unit": "pt"}}
+    _STYLE_FIELDS = "bold,fontSize"
+    # Only the end index is needed to locate the insertion point, plus the
+    # revision that guards writes made from it
+    _END_INDEX_FIELDS = "revisionId,body(content(endIndex))"
+    # Calls multiplexed into one batch HTTP request
+    _MAX_BATCH = 10
+    # Entries the background writer merges into one write_entries call
+    _QUEUE_BATCH = 16
+    _API_URL = "https://docs.googleapis.com/v1/documents/"
+    
+    # Entry sections per priority, in order: (header, header prefix, renderer,
+    # field, options). "optional" sections are skipped when the field is empty
+    _SECTIONS = {
+        "low": (
+            ("SUMMARY", "\n", "text", "summary", {"default": "No summary"}),
+            ("COMPLETED TASK", "\n✓ ", "text", "task_description", {"optional": True}),
+            ("ACHIEVEMENTS", "\n", "bullets", "achievements", {"optional": True, "bullet": "  ✓ ", "limit": 2}),
+            ("TAGS", "\n🏷️ ", "joined", "tags", {"optional": True}),
+        ),
+        "medium": (
+            ("SUMMARY", "\n", "text", "summary", {"default": "No summary provided"}),
+            ("TASK DESCRIPTION", "\n", "text", "task_description", {"default": "No description"}),
+            ("ACHIEVEMENTS", "\n", "bullets", "achievements", {"default": [], "bullet": "  ✓ ", "limit": 3}),
+            ("TECHNICAL IMPLEMENTATION", "\n", "technical", "technical_implementation", {
+                "optional": True, "require": ("technologies", "key_points"),
+                "approach": "Approach: ", "points_heading": ""
+            }),
+            ("CHALLENGES", "\n", "challenges", "challenges", {
+                "optional": True, "limit": 2,
+                "issue": "Issue: ", "resolution": "  ✓ Resolution: "
+            }),
+            ("NEXT STEPS", "\n", "bullets", "next_steps", {"optional": True, "bullet": "  • ", "limit": 2}),
+            ("TAGS", "\n🏷️ ", "joined", "tags", {"optional": True}),
+        ),
+        "high": (
+            ("EXECUTIVE SUMMARY", "\n", "text", "summary", {"default": "No summary provided"}),
+            ("DETAILED TASK DESCRIPTION", "\n", "text", "task_description", {"default": "No description"}),
+            ("KEY ACHIEVEMENTS", "\n", "bullets", "achievements", {"default": [], "bullet": "  ✓ "}),
+            ("TECHNICAL IMPLEMENTATION", "\n", "technical", "technical_implementation", {
+                "optional": True,
+                "approach": "Approach:\n  ", "points_heading": "Key Points:\n"
+            }),
+            ("CHALLENGES & SOLUTIONS", "\n", "challenges", "challenges", {
+                "optional": True,
+                "issue": "Challenge:\n  ", "resolution": "Solution:\n  "
+            }),
+            ("NEXT STEPS & RECOMMENDATIONS", "\n", "bullets", "next_steps", {"optional": True, "bullet": "  • "}),
+            ("TAGS", "\n🏷️ ", "joined", "tags", {"optional": True}),
+        ),
+    }
+    
     def __init__(self, service_account_file: str, scopes: List[str]):
         self.service_account_file = service_account_file
         self.scopes = scopes
-        self.service, self.sa_email = self._init_service()
+        self.service, self._credentials = self._init_service()
+        self.sa_email = self._credentials.service_account_email
+        # Last known (insertion index, revision id) per document, advanced
+        # from each batchUpdate response so follow-up entries skip the
+        # documents().get round trip. Writes require that revision, so an
+        # edit made elsewhere is rejected instead of landing mid-document
+        self._end_index: Dict[str, Tuple[int, Optional[str]]] = {}
+        # Writes to one doc must not race on its cached index, whichever path
+        # (sync or HTTP/2) they take; see _doc_lock()
+        self._doc_locks: Dict[str, threading.Lock] = {}
+        # The Docs client (httplib2) is not thread-safe; always taken after
+        # any doc locks
+        self._lock = threading.Lock()
+        # Background writer state, see start_writer()
+        self._queue = None
+        self._writer_task = None
+        # Async HTTP/2 client, see open_http_client()
+        self._http: Optional[httpx.AsyncClient] = None
+        self._refresh_lock = None
     
     def _init_service(self):
-        creds = Credentials.from_service_account_file(
-            self.service_account_file, 
-            scopes=self.scopes
-        )
-        service = build("docs", "v1", credentials=creds)
+        return _build_service(self.service_account_file, tuple(self.scopes))
+    
+    def write_entry(self, doc_id: str, doc_data: Dict, header_written: bool = False) -> bool:
+        """
+        Write validated documentation with metrics
+        
+        With header_written, only the body is appended, right after a
+        header previously written by write_header.
+        """
+        # Check validation metrics
+        metrics = doc_data.get("metrics", {})
+        if metrics:
+            self._log_validation(metrics)
+        
+        build = self._build_body if header_written else self._build_minimal_content
+        if not self._write(doc_id, doc_data, build):
+            return False
+        
+        print("✅ Documentation written successfully")
+        return True
+    
+    async def write_entry_async(self, doc_id: str, doc_data: Dict, header_written: bool = False) -> bool:
+        """
+        Async write_entry
+        
+        Goes straight over the HTTP/2 client when one is open, otherwise
+        runs write_entry in the default executor.
+        """
+        if self._http is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                None, self.write_entry, doc_id, doc_data, header_written
+            )
+        
+        metrics = doc_data.get("metrics", {})
+        if metrics:
+            self._log_validation(metrics)
+        
+        build = self._build_body if header_written else self._build_minimal_content
+        if not await self._write_async(doc_id, doc_data, build):
+            return False
         
-        with open(self.service_account_file, "r") as f:
-            sa = json.load(f)
-        return service, sa.get("client_email")
+        print("✅ Documentation written successfully")
+        return True
     
-    def write_entry(self, doc_id: str, doc_data: Dict) -> bool:
-        """Write validated documentation with metrics"""
+    def write_header(self, doc_id: str, header_data: Dict) -> bool:
+        """Write only the entry title and metadata line"""
+        return self._write(doc_id, header_data, self._build_header)
+    
+    async def write_header_async(self, doc_id: str, header_data: Dict) -> bool:
+        """Async write_header, over the HTTP/2 client when one is open"""
+        if self._http is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, self.write_header, doc_id, header_data)
+        return await self._write_async(doc_id, header_data, self._build_header)
+    
+    def _write(self, doc_id: str, doc_data: Dict, build: Callable[[int, Dict], List[Dict]]) -> bool:
+        """Append the requests from build at the end of the doc"""
         try:
-            # Get safe insertion point
-            doc = self.service.documents().get(documentId=doc_id).execute()
-            safe_index = self._get_safe_index(doc)
+            with self._doc_lock(doc_id), self._lock:
+                cached = doc_id in self._end_index
+                try:
+                    self._append(doc_id, doc_data, build)
+                except HttpError as e:
+                    # A stale cached revision means the doc changed elsewhere;
+                    # refetch once. Other errors may have been applied, so
+                    # they are never replayed
+                    self._end_index.pop(doc_id, None)
+                    if not (cached and _is_revision_conflict(e.resp.status, e.content)):
+                        raise
+                    self._append(doc_id, doc_data, build)
+            return True
+            
+        except HttpError as e:
+            print(f"❌ Docs API Error: {e}")
+            return False
+        except Exception as e:
+            print(f"❌ Error: {e}")
+            return False
+    
+    def _append(self, doc_id: str, doc_data: Dict, build: Callable[[int, Dict], List[Dict]]):
+        """Append content at the end of the doc in a single batchUpdate"""
+        if doc_id not in self._end_index:
+            # Only the first write to a doc needs its current end index
+            doc = self.service.documents().get(
+                documentId=doc_id,
+                fields=self._END_INDEX_FIELDS
+            ).execute()
+            self._end_index[doc_id] = (self._get_safe_index(doc), doc.get("revisionId"))
+        safe_index, revision_id = self._end_index[doc_id]
+        
+        # Build content based on priority
+        requests = build(safe_index, doc_data)
+        
+        # Write to docs
+        response = self.service.documents().batchUpdate(
+            documentId=doc_id, 
+            body=self._update_body(requests, revision_id)
+        ).execute()
+        
+        self._record_write(doc_id, safe_index, requests, response)
+    
+    def write_entries(self, entries: List[Tuple[str, Dict]]) -> List[bool]:
+        """
+        Write several entries using batched HTTP requests
+        
+        Entries for the same doc are merged, in order, into one batchUpdate;
+        updates for different docs are multiplexed into batch HTTP requests.
+        
+        Args:
+            entries: (doc_id, doc_data) pairs
             
-            # Check validation metrics
+        Returns:
+            Success flag for each entry
+        """
+        results = [False] * len(entries)
+        by_doc: Dict[str, List[int]] = {}
+        for i, (doc_id, doc_data) in enumerate(entries):
+            by_doc.setdefault(doc_id, []).append(i)
             metrics = doc_data.get("metrics", {})
             if metrics:
                 self._log_validation(metrics)
+        
+        try:
+            with contextlib.ExitStack() as held:
+                # Sorted, so concurrent multi-doc writers cannot deadlock
+                for doc_id in sorted(by_doc):
+                    held.enter_context(self._doc_lock(doc_id))
+                held.enter_context(self._lock)
+                
+                # Docs whose cached revision turned out stale get one more
+                # round from a fresh fetch; other failures are not replayed
+                pending = list(by_doc)
+                for attempt in range(2):
+                    cached = {d for d in pending if d in self._end_index}
+                    self._fetch_end_indexes([d for d in pending if d not in cached])
+                    
+                    updates = {}
+                    for doc_id in pending:
+                        if doc_id not in self._end_index:
+                            continue
+                        index, revision_id = self._end_index[doc_id]
+                        requests = self._build_many(index, [entries[i][1] for i in by_doc[doc_id]])
+                        updates[doc_id] = (index, requests, revision_id)
+                    
+                    conflicts = []
+                    
+                    def on_update(doc_id, response, exception):
+                        if exception is not None:
+                            self._end_index.pop(doc_id, None)
+                            if (attempt == 0 and doc_id in cached and isinstance(exception, HttpError)
+                                    and _is_revision_conflict(exception.resp.status, exception.content)):
+                                conflicts.append(doc_id)
+                                return
+                            print(f"❌ Docs API Error: {exception}")
+                            return
+                        index, requests, _ = updates[doc_id]
+                        self._record_write(doc_id, index, requests, response)
+                        for i in by_doc[doc_id]:
+                            results[i] = True
+                    
+                    self._execute_batched([
+                        (doc_id, self.service.documents().batchUpdate(
+                            documentId=doc_id,
+                            body=self._update_body(requests, revision_id)
+                        ))
+                        for doc_id, (_, requests, revision_id) in updates.items()
+                    ], on_update)
+                    
+                    if not conflicts:
+                        break
+                    pending = conflicts
+        except Exception as e:
+            print(f"❌ Error: {e}")
+        
+        print(f"✅ Wrote {sum(results)}/{len(entries)} entries")
+        return results
+    
+    def start_writer(self):
+        """Start the background task that drains enqueue_entry in batches"""
+        self._queue = asyncio.Queue()
+        self._writer_task = asyncio.create_task(self._run_writer())
+    
+    async def stop_writer(self):
+        """Write whatever is still queued, then stop the background task"""
+        if self._writer_task is None:
+            return
+        await self._queue.put(None)
+        await self._writer_task
+        self._queue = self._writer_task = None
+    
+    async def enqueue_entry(self, doc_id: str, doc_data: Dict) -> asyncio.Future:
+        """
+        Queue an entry for the background writer
+        
+        Returns:
+            Future resolving to the entry's success flag
+        """
+        if self._writer_task is None:
+            return asyncio.ensure_future(self.write_entry_async(doc_id, doc_data))
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((doc_id, doc_data, future))
+        return future
+    
+    async def _run_writer(self):
+        """
+        Flush queued entries through write_entries
+        
+        Whatever piles up while one flush is in flight goes out with the
+        next one, so a lone entry is written immediately and bursts share
+        round trips.
+        """
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            batch = []
+            item = await self._queue.get()
+            while item is not None:
+                batch.append(item)
+                if len(batch) >= self._QUEUE_BATCH or self._queue.empty():
+                    break
+                item = self._queue.get_nowait()
+            stopping = item is None
+            if not batch:
+                continue
             
-            # Build content based on priority
-            requests = self._build_minimal_content(safe_index, doc_data)
-            
-            # Write to docs
-            self.service.documents().batchUpdate(
-                documentId=doc_id, 
-                body={"requests": requests}
-            ).execute()
+            entries = [(doc_id, doc_data) for doc_id, doc_data, _ in batch]
+            try:
+                if self._http is not None:
+                    results = await self._write_entries_async(entries)
+                else:
+                    results = await loop.run_in_executor(None, self.write_entries, entries)
+            except Exception as e:
+                print(f"❌ Error: {e}")
+                results = [False] * len(batch)
             
-            print("✅ Documentation written successfully")
+            for (_, _, future), ok in zip(batch, results):
+                if not future.done():
+                    future.set_result(ok)
+    
+    def open_http_client(self):
+        """
+        Open a pooled HTTP/2 client for the async write paths
+        
+        batchUpdate calls then skip the executor and share connections
+        instead of going through httplib2.
+        """
+        self._http = httpx.AsyncClient(
+            http2=True,
+            limits=httpx.Limits(max_connections=32, max_keepalive_connections=32),
+            timeout=30
+        )
+        self._refresh_lock = asyncio.Lock()
+    
+    async def close_http_client(self):
+        """Close the client opened by open_http_client"""
+        if self._http is not None:
+            await self._http.aclose()
+            self._http = None
+    
+    async def _write_entries_async(self, entries: List[Tuple[str, Dict]]) -> List[bool]:
+        """write_entries over the HTTP/2 client, docs written concurrently"""
+        by_doc: Dict[str, List[int]] = {}
+        for i, (doc_id, doc_data) in enumerate(entries):
+            by_doc.setdefault(doc_id, []).append(i)
+            metrics = doc_data.get("metrics", {})
+            if metrics:
+                self._log_validation(metrics)
+        
+        written = await asyncio.gather(*(
+            self._write_async(doc_id, [entries[i][1] for i in positions], self._build_many)
+            for doc_id, positions in by_doc.items()
+        ))
+        
+        results = [False] * len(entries)
+        for ok, positions in zip(written, by_doc.values()):
+            for i in positions:
+                results[i] = ok
+        
+        print(f"✅ Wrote {sum(results)}/{len(entries)} entries")
+        return results
+    
+    async def _write_async(self, doc_id: str, doc_data: Any, build: Callable[[int, Any], List[Dict]]) -> bool:
+        """_write over the HTTP/2 client; writes to one doc are serialized"""
+        try:
+            async with self._hold_doc_lock(doc_id):
+                cached = doc_id in self._end_index
+                try:
+                    await self._append_async(doc_id, doc_data, build)
+                except httpx.HTTPStatusError as e:
+                    self._end_index.pop(doc_id, None)
+                    if not (cached and _is_revision_conflict(e.response.status_code, e.response.content)):
+                        raise
+                    await self._append_async(doc_id, doc_data, build)
             return True
             
-        except HttpError as e:
+        except httpx.HTTPStatusError as e:
             print(f"❌ Docs API Error: {e}")
             return False
         except Exception as e:
             print(f"❌ Error: {e}")
             return False
     
+    def _doc_lock(self, doc_id: str) -> threading.Lock:
+        """Lock guarding a doc's cached end index"""
+        lock = self._doc_locks.get(doc_id)
+        if lock is None:
+            lock = self._doc_locks.setdefault(doc_id, threading.Lock())
+        return lock
+    
+    @contextlib.asynccontextmanager
+    async def _hold_doc_lock(self, doc_id: str):
+        """Hold _doc_lock(doc_id) without blocking the event loop"""
+        lock = self._doc_lock(doc_id)
+        # Polling keeps cancellation safe: a cancelled waiter never ends up
+        # owning the lock. Contention is rare (same doc, concurrent writes)
+        while not lock.acquire(blocking=False):
+            await asyncio.sleep(0.005)
+        try:
+            yield
+        finally:
+            lock.release()
+    
+    async def _append_async(self, doc_id: str, doc_data: Any, build: Callable[[int, Any], List[Dict]]):
+        """_append over the HTTP/2 client"""
+        headers = await self._auth_headers()
+        
+        if doc_id not in self._end_index:
+            response = await self._http.get(
+                self._API_URL + doc_id,
+                params={"fields": self._END_INDEX_FIELDS},
+                headers=headers
+            )
+            response.raise_for_status()
+            doc = response.json()
+            self._end_index[doc_id] = (self._get_safe_index(doc), doc.get("revisionId"))
+        safe_index, revision_id = self._end_index[doc_id]
+        
+        requests = build(safe_index, doc_data)
+        
+        response = await self._http.post(
+            f"{self._API_URL}{doc_id}:batchUpdate",
+            json=self._update_body(requests, revision_id),
+            headers=headers
+        )
+        response.raise_for_status()
+        
+        self._record_write(doc_id, safe_index, requests, response.json())
+    
+    async def _auth_headers(self) -> Dict[str, str]:
+        """Bearer header, refreshing the service account token when needed"""
+        if not self._credentials.valid:
+            async with self._refresh_lock:
+                if not self._credentials.valid:
+                    loop = asyncio.get_running_loop()
+                    await loop.run_in_executor(None, self._credentials.refresh, Request())
+        return {"Authorization": f"Bearer {self._credentials.token}"}
+    
+    def _fetch_end_indexes(self, doc_ids: List[str]):
+        """Fill the end-index cache for the given docs in batched requests"""
+        def on_get(doc_id, response, exception):
+            if exception is not None:
+                print(f"❌ Docs API Error: {exception}")
+                return
+            self._end_index[doc_id] = (self._get_safe_index(response), response.get("revisionId"))
+        
+        self._execute_batched([
+            (doc_id, self.service.documents().get(
+                documentId=doc_id,
+                fields=self._END_INDEX_FIELDS
+            ))
+            for doc_id in doc_ids
+        ], on_get)
+    
+    def _execute_batched(self, calls: List[Tuple[str, Any]], callback):
+        """Execute (request_id, request) pairs, _MAX_BATCH per HTTP request"""
+        for i in range(0, len(calls), self._MAX_BATCH):
+            batch = self.service.new_batch_http_request(callback=callback)
+            for request_id, call in calls[i:i + self._MAX_BATCH]:
+                batch.add(call, request_id=request_id)
+            batch.execute()
+    
+    @staticmethod
+    def _update_body(requests: List[Dict], revision_id: Optional[str]) -> Dict:
+        """batchUpdate body, required to apply to revision_id when known"""
+        body = {"requests": requests}
+        if revision_id:
+            body["writeControl"] = {"requiredRevisionId": revision_id}
+        return body
+    
+    def _record_write(self, doc_id: str, index: int, requests: List[Dict], response: Dict):
+        """Advance the cached index and take the new revision from a batchUpdate response"""
+        revision_id = response.get("writeControl", {}).get("requiredRevisionId")
+        self._end_index[doc_id] = (index + self._inserted_length(requests), revision_id)
+    
+    @staticmethod
+    def _inserted_length(requests: List[Dict]) -> int:
+        """Total text inserted by a request list, in Docs index units"""
+        return sum(
+            _doc_len(r["insertText"]["text"]) for r in requests if "insertText" in r
+        )
+    
     def _get_safe_index(self, doc: Dict) -> int:
         """Find safe insertion point in document"""
         content = doc.get("body", {}).get("content", [])
@@ -76,331 +564,192 @@ class DocsAgent:
     
     def _build_minimal_content(self, start_index: int, doc_data: Dict) -> List[Dict]:
         """Build formatted content with selective Google Docs styling"""
-        data = doc_data["structured"]
-        priority = data.get("priority", "medium")
-        timestamp = doc_data["timestamp"]
-        
-        # Build requests with selective formatting
+        header_text, header_ranges = self._header_parts(doc_data)
+        body_text, body_ranges = self._body_parts(doc_data)
+        
+        # Insert the whole entry at once; body styles shift past the header
+        offset = _doc_len(header_text)
+        return self._styled_insert(
+            start_index,
+            header_text + body_text,
+            header_ranges + [(s + offset, e + offset, style) for s, e, style in body_ranges]
+        )
+    
+    def _build_many(self, start_index: int, entries: List[Dict]) -> List[Dict]:
+        """Minimal content for several entries, appended one after another"""
         requests = []
-        current_index = start_index
-        
-        # Add title with bold formatting
-        title = data.get("title", "Work Log")
-        title_text = "📊 " + title + "\n"
-        requests.append({
+        for doc_data in entries:
+            entry_requests = self._build_minimal_content(start_index, doc_data)
+            requests.extend(entry_requests)
+            start_index += self._inserted_length(entry_requests)
+        return requests
+    
+    def _build_header(self, start_index: int, doc_data: Dict) -> List[Dict]:
+        """Requests for the title and metadata line only"""
+        return self._styled_insert(start_index, *self._header_parts(doc_data))
+    
+    def _build_body(self, start_index: int, doc_data: Dict) -> List[Dict]:
+        """Requests for everything below the metadata line"""
+        return self._styled_insert(start_index, *self._body_parts(doc_data))
+    
+    def _styled_insert(self, start_index: int, text: str, ranges: List[Tuple]) -> List[Dict]:
+        """One insertText followed by a style request per (start, end, style) offset range"""
+        requests = [{
             "insertText": {
-                "location": {"index": current_index},
-                "text": title_text
+                "location": {"index": start_index},
+                "text": text
             }
-        })
-        # Bold just the title text (exclude newline)
-        requests.append({
-            "updateTextStyle": {
-                "range": {
-                    "startIndex": current_index,
-                    "endIndex": current_index + len(title_text) - 1
-                },
-                "textStyle": {
-                    "bold": True,
-                    "fontSize": {"magnitude": 18, "unit": "pt"}
-                },
-                "fields": "bold,fontSize"
-            }
-        })
-        current_index += len(title_text)
+        }]
+        for start, end, style in ranges:
+            requests.append({
+                "updateTextStyle": {
+                    "range": {"startIndex": start_index + start, "endIndex": start_index + end},
+                    "textStyle": style,
+                    "fields": self._STYLE_FIELDS
+                }
+            })
+        return requests
+    
+    def _header_parts(self, doc_data: Dict) -> Tuple[str, List[Tuple]]:
+        """Title and metadata line (not bold) with spacing, plus title style"""
+        data = doc_data["structured"]
+        priority = getattr(data, "priority", None) or "medium"
         
-        # Add metadata line (not bold) with spacing
-        meta_text = "📅 " + timestamp + " | Priority: " + priority.upper() + "\n\n"
-        requests.append({
-            "insertText": {
-                "location": {"index": current_index},
-                "text": meta_text
-            }
-        })
-        current_index += len(meta_text)
+        title = getattr(data, "title", None) or "Work Log"
+        title_text = "📊 " + title + "\n"
+        meta_text = "📅 " + doc_data["timestamp"] + " | Priority: " + priority.upper() + "\n\n"
+        
+        # Bold just the title text (exclude newline)
+        return title_text + meta_text, [(0, _doc_len(title_text) - 1, self._TITLE_STYLE)]
+    
+    def _body_parts(self, doc_data: Dict) -> Tuple[str, List[Tuple]]:
+        """Priority-specific content and metrics footer, plus header styles"""
+        data = doc_data["structured"]
+        priority = getattr(data, "priority", None) or "medium"
         
         # Build content based on priority and track positions
-        if priority == "low":
-            content_result = self._build_low_content_with_headers(data)
-        elif priority == "high":
-            content_result = self._build_high_content_with_headers(data)
-        else:
-            content_result = self._build_medium_content_with_headers(data)
+        priority = getattr(priority, "value", priority)
+        sections = self._SECTIONS.get(priority, self._SECTIONS["medium"])
+        content_result = self._render(data, sections)
         
         content_text = content_result['text']
         
-        # Insert main content
-        requests.append({
-            "insertText": {
-                "location": {"index": current_index},
-                "text": content_text
-            }
-        })
-        
-        # Apply bold formatting to headers only
-        for header_info in content_result['headers']:
-            start = current_index + header_info['start']
-            end = current_index + header_info['end']
-            requests.append({
-                "updateTextStyle": {
-                    "range": {
-                        "startIndex": start,
-                        "endIndex": end
-                    },
-                    "textStyle": {
-                        "bold": True,
-                        "fontSize": {"magnitude": 12, "unit": "pt"}
-                    },
-                    "fields": "bold,fontSize"
-                }
-            })
-        
-        current_index += len(content_text)
+        # Bold formatting for headers only
+        ranges = [(h['start'], h['end'], self._HEADER_STYLE) for h in content_result['headers']]
         
         # Add metrics if available
+        metrics_text = ""
         if "metrics" in doc_data:
             metrics_text = self._format_metrics_footer(doc_data["metrics"])
-            requests.append({
-                "insertText": {
-                    "location": {"index": current_index},
-                    "text": metrics_text
-                }
-            })
-            
-            # Bold the metrics header
-            metrics_header_start = metrics_text.find("GENERATION METRICS")
-            if metrics_header_start >= 0:
-                requests.append({
-                    "updateTextStyle": {
-                        "range": {
-                            "startIndex": current_index + metrics_header_start,
-                            "endIndex": current_index + metrics_header_start + len("GENERATION METRICS")
-                        },
-                        "textStyle": {
-                            "bold": True,
-                            "fontSize": {"magnitude": 12, "unit": "pt"}
-                        },
-                        "fields": "bold,fontSize"
-                    }
-                })
-        
-        return requests
-    
-    def _build_low_content_with_headers(self, data: Dict) -> Dict:
-        """Build low priority content with accurate header tracking"""
-        text = ""
-        headers = []
-        
-        # Summary section
-        text_before = text
-        text += "\nSUMMARY\n"
-        summary_pos = len(text_before) + 1
-        headers.append({
-            "start": summary_pos,
-            "end": summary_pos + len("SUMMARY")
-        })
-        text += data.get('summary', 'No summary') + "\n"
-        
-        if data.get('task_description'):
-            text_before = text
-            text += "\n✓ COMPLETED TASK\n"
-            task_pos = len(text_before) + 2  # Skip newline and emoji
-            headers.append({
-                "start": task_pos,
-                "end": task_pos + len("COMPLETED TASK")
-            })
-            text += data.get('task_description') + "\n"
-        
-        if data.get('achievements'):
-            text_before = text
-            text += "\nACHIEVEMENTS\n"
-            ach_pos = len(text_before) + 1
-            headers.append({
-                "start": ach_pos,
-                "end": ach_pos + len("ACHIEVEMENTS")
-            })
-            
-            for ach in data['achievements'][:2]:
-                text += "  ✓ " + ach + "\n"
-        
-        if data.get('tags'):
-            text_before = text
-            text += "\n🏷️ TAGS\n"
-            tags_pos = len(text_before) + 2  # Skip newline and emoji
-            headers.append({
-                "start": tags_pos,
-                "end": tags_pos + len("TAGS")
-            })
-            text += ", ".join(data['tags']) + "\n"
-        
-        text += "\n"
-        return {"text": text, "headers": headers}
-    
-    def _build_medium_content_with_headers(self, data: Dict) -> Dict:
-        """Build medium priority content with accurate header tracking"""
-        text = ""
-        headers = []
-        
-        # Summary
-        text += "\nSUMMARY\n"
-        headers.append({"start": 1, "end": 1 + len("SUMMARY")})
-        text += data.get('summary', 'No summary provided') + "\n"
-        
-        # Task Description
-        text_len = len(text)
-        text += "\nTASK DESCRIPTION\n"
-        headers.append({"start": text_len + 1, "end": text_len + 1 + len("TASK DESCRIPTION")})
-        text += data.get('task_description', 'No description') + "\n"
-        
-        # Achievements
-        text_len = len(text)
-        text += "\nACHIEVEMENTS\n"
-        headers.append({"start": text_len + 1, "end": text_len + 1 + len("ACHIEVEMENTS")})
-        for ach in data.get('achievements', [])[:3]:
-            text += "  ✓ " + ach + "\n"
-        
-        # Technical
-        tech = data.get('technical_implementation')
-        if tech and (tech.get('technologies') or tech.get('key_points')):
-            text_len = len(text)
-            text += "\nTECHNICAL IMPLEMENTATION\n"
-            headers.append({"start": text_len + 1, "end": text_len + 1 + len("TECHNICAL IMPLEMENTATION")})
-            
-            if tech.get('approach'):
-                text += "Approach: " + tech['approach'] + "\n"
-            if tech.get('technologies'):
-                text += "Technologies: " + ", ".join(tech['technologies']) + "\n"
-            for point in tech.get('key_points', []):
-                text += "  • " + point + "\n"
-        
-        # Challenges
-        challenges = data.get('challenges', [])
-        if challenges:
-            text_len = len(text)
-            text += "\nCHALLENGES\n"
-            headers.append({"start": text_len + 1, "end": text_len + 1 + len("CHALLENGES")})
-            
-            for ch in challenges[:2]:
-                if isinstance(ch, dict):
-                    text += "Issue: " + ch.get('issue', 'N/A') + "\n"
-                    if ch.get('resolution'):
-                        text += "  ✓ Resolution: " + ch['resolution'] + "\n"
-        
-        # Next Steps
-        next_steps = data.get('next_steps', [])
-        if next_steps:
-            text_len = len(text)
-            text += "\nNEXT STEPS\n"
-            headers.append({"start": text_len + 1, "end": text_len + 1 + len("NEXT STEPS")})
-            
-            for step in next_steps[:2]:
-                text += "  • " + step + "\n"
-        
-        # Tags
-        if data.get('tags'):
-            text_len = len(text)
-            text += "\n🏷️ TAGS\n"
-            headers.append({"start": text_len + 2, "end": text_len + 2 + len("TAGS")})
-            text += ", ".join(data['tags']) + "\n"
-        
-        text += "\n"
-        return {"text": text, "headers": headers}
-    
-    def _build_high_content_with_headers(self, data: Dict) -> Dict:
-        """Build high priority content with accurate header tracking"""
-        text = ""
-        headers = []
-        
-        # Executive Summary
-        text += "\nEXECUTIVE SUMMARY\n"
-        headers.append({"start": 1, "end": 1 + len("EXECUTIVE SUMMARY")})
-        text += data.get('summary', 'No summary provided') + "\n"
-        
-        # Detailed Task Description
-        text_len = len(text)
-        text += "\nDETAILED TASK DESCRIPTION\n"
-        headers.append({"start": text_len + 1, "end": text_len + 1 + len("DETAILED TASK DESCRIPTION")})
-        text += data.get('task_description', 'No description') + "\n"
-        
-        # Key Achievements
-        text_len = len(text)
-        text += "\nKEY ACHIEVEMENTS\n"
-        headers.append({"start": text_len + 1, "end": text_len + 1 + len("KEY ACHIEVEMENTS")})
-        for ach in data.get('achievements', []):
-            text += "  ✓ " + ach + "\n"
-        
-        # Technical Implementation
-        tech = data.get('technical_implementation')
-        if tech:
-            text_len = len(text)
-            text += "\nTECHNICAL IMPLEMENTATION\n"
-            headers.append({"start": text_len + 1, "end": text_len + 1 + len("TECHNICAL IMPLEMENTATION")})
-            
-            if tech.get('approach'):
-                text += "Approach:\n  " + tech['approach'] + "\n"
-            if tech.get('technologies'):
-                text += "Technologies: " + ", ".join(tech['technologies']) + "\n"
-            if tech.get('key_points'):
-                text += "Key Points:\n"
-                for point in tech.get('key_points', []):
-                    text += "  • " + point + "\n"
-        
-        # Challenges & Solutions
-        challenges = data.get('challenges', [])
-        if challenges:
-            text_len = len(text)
-            text += "\nCHALLENGES & SOLUTIONS\n"
-            headers.append({"start": text_len + 1, "end": text_len + 1 + len("CHALLENGES & SOLUTIONS")})
-            
-            for ch in challenges:
-                if isinstance(ch, dict):
-                    text += "Challenge:\n  " + ch.get('issue', 'N/A') + "\n"
-                    if ch.get('resolution'):
-                        text += "Solution:\n  " + ch['resolution'] + "\n"
-        
-        # Next Steps
-        next_steps = data.get('next_steps', [])
-        if next_steps:
-            text_len = len(text)
-            text += "\nNEXT STEPS & RECOMMENDATIONS\n"
-            headers.append({"start": text_len + 1, "end": text_len + 1 + len("NEXT STEPS & RECOMMENDATIONS")})
-            
-            for step in next_steps:
-                text += "  • " + step + "\n"
         
-        # Tags
-        if data.get('tags'):
-            text_len = len(text)
-            text += "\n🏷️ TAGS\n"
-            headers.append({"start": text_len + 2, "end": text_len + 2 + len("TAGS")})
-            text += ", ".join(data['tags']) + "\n"
+        # Bold the metrics header
+        metrics_header_start = metrics_text.find("GENERATION METRICS")
+        if metrics_header_start >= 0:
+            start = _doc_len(content_text) + metrics_header_start
+            ranges.append((start, start + len("GENERATION METRICS"), self._HEADER_STYLE))
         
-        text += "\n"
-        return {"text": text, "headers": headers}
+        return content_text + metrics_text, ranges
+    
+    def _render(self, data: Any, sections) -> Dict:
+        """Render the given sections with accurate header tracking"""
+        b = _ContentBuilder()
+        for label, prefix, kind, field, opts in sections:
+            value = getattr(data, field, None) or opts.get("default")
+            if opts.get("optional") and not self._has_content(value, opts):
+                continue
+            b.add_header(label, prefix)
+            getattr(self, "_render_" + kind)(b, value, opts)
+        
+        b.add("\n")
+        return b.build()
+    
+    def _has_content(self, value, opts: Dict) -> bool:
+        """Whether an optional section has anything to show"""
+        if not value:
+            return False
+        require = opts.get("require")
+        return not require or any(getattr(value, key, None) for key in require)
+    
+    def _render_text(self, b: _ContentBuilder, value: str, opts: Dict):
+        b.add(value + "\n")
+    
+    def _render_joined(self, b: _ContentBuilder, items: List[str], opts: Dict):
+        b.add(", ".join(items) + "\n")
+    
+    def _render_bullets(self, b: _ContentBuilder, items: List[str], opts: Dict):
+        bullet = opts["bullet"]
+        for item in items[:opts.get("limit")]:
+            b.add(bullet + item + "\n")
+    
+    def _render_technical(self, b: _ContentBuilder, tech: Any, opts: Dict):
+        if tech.approach:
+            b.add(opts["approach"] + tech.approach + "\n")
+        if tech.technologies:
+            b.add("Technologies: " + ", ".join(tech.technologies) + "\n")
+        points = tech.key_points
+        if points and opts["points_heading"]:
+            b.add(opts["points_heading"])
+        for point in points:
+            b.add("  • " + point + "\n")
+    
+    def _render_challenges(self, b: _ContentBuilder, challenges: List, opts: Dict):
+        for ch in challenges[:opts.get("limit")]:
+            b.add(opts["issue"] + (ch.issue or 'N/A') + "\n")
+            if ch.resolution:
+                b.add(opts["resolution"] + ch.resolution + "\n")
     
     def _format_metrics_footer(self, metrics: Dict) -> str:
         """Add validation metrics footer with clean formatting"""
-        lines = []
-        lines.append("\nGENERATION METRICS\n")
-        lines.append("Correctness: " + f"{metrics.get('confidence_score', 0):.0%}\n")
-        lines.append("Generation Time: " + f"{metrics.get('generation_time', 0):.2f}s\n")
-        lines.append("\nGenerated by Validated AI Documentation Assistant\n\n")
-        return "".join(lines)
+        return (
+            "\nGENERATION METRICS\n"
+            f"Correctness: {metrics.get('confidence_score', 0):.0%}\n"
+            f"Generation Time: {metrics.get('generation_time', 0):.2f}s\n"
+            "\nGenerated by Validated AI Documentation Assistant\n\n"
+        )
 
 # Integration example
 if __name__ == "__main__":
-    from config import SERVICE_ACCOUNT_FILE, SCOPES, GOOGLE_DOC_ID
+    from config import SERVICE_ACCOUNT_FILE, SCOPES, DOC_ID
     from config import GEMINI_API_KEY, FULL_NAME
-    from validated_doc_agent import ValidatedDocAgent, TaskPriority
+    from agents.gemini_agent import ValidatedDocAgent, TaskPriority
     
-    # Generate documentation
     agent = ValidatedDocAgent(api_key=GEMINI_API_KEY, full_name=FULL_NAME)
-    doc_data = agent.generate_documentation(
-        task_topic="API optimization",
-        details="Reduced latency by 40% through caching",
-        priority=TaskPriority.MEDIUM
-    )
+    writer = DocsAgent(SERVICE_ACCOUNT_FILE, SCOPES)
+    
+    tasks = [
+        ("API optimization", "Reduced latency by 40% through caching", TaskPriority.MEDIUM),
+        ("Fixed bug in API", "Corrected null pointer in /predict endpoint", TaskPriority.LOW),
+    ]
+    
+    async def run():
+        # Stream each generation; its header is written as soon as the title
+        # is known, and its body write is left running while the next entry
+        # generates. Each write waits for the previous entry's body so the
+        # entries stay in order in the doc
+        body_write = None
+        for topic, details, priority in tasks:
+            previous_body, header_write = body_write, None
+            
+            async def write_header(header_data, previous_body=previous_body):
+                if previous_body is not None:
+                    await previous_body
+                return await writer.write_header_async(DOC_ID, header_data)
+            
+            def on_title(header_data):
+                nonlocal header_write
+                header_write = asyncio.create_task(write_header(header_data))
+            
+            doc_data = await agent.agenerate_documentation(
+                topic, details, priority=priority, on_title=on_title
+            )
+            if previous_body is not None:
+                await previous_body
+            header_written = await header_write if header_write else False
+            body_write = asyncio.create_task(
+                writer.write_entry_async(DOC_ID, doc_data, header_written=header_written)
+            )
+        
+        if body_write is not None:
+            await body_write
     
-    # Write to Google Docs
-    writer = ValidatedDocsWriter(SERVICE_ACCOUNT_FILE, SCOPES)
-    writer.write_entry(GOOGLE_DOC_ID, doc_data)
\ No newline at end of file
+    asyncio.run(run())
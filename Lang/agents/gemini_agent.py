@@ -1,11 +1,13 @@
 from langchain_google_genai import ChatGoogleGenerativeAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.output_parsers import PydanticOutputParser
-from pydantic import BaseModel, Field, validator
+from langchain_core.output_parsers import PydanticOutputParser, JsonOutputParser
+from pydantic import BaseModel, Field, field_validator
 from langchain_core.tools import tool
-from typing import List, Dict, Any, Optional, Literal
+from typing import List, Dict, Any, Optional, Literal, Callable, Union
 from datetime import datetime
 from enum import Enum
+import re
+import time
 
 # Priority levels affect generation detail
 class TaskPriority(str, Enum):
@@ -32,28 +34,31 @@ class Challenge(BaseModel):
     issue: str = Field(description="Actual issue mentioned")
     resolution: Optional[str] = Field(default=None, description="Only if resolved")
 
+# Hard caps on list fields, also advertised to the LLM via the JSON schema
+_LIST_LIMITS = {"achievements": 3, "next_steps": 2}
+
 class WorkLogEntry(BaseModel):
     title: str
     summary: str = Field(description="Up to 4 lines, comprehensive overview")
     task_description: str = Field(description="From user input only")
-    achievements: List[str] = Field(description="Max 3, only factual")
+    achievements: List[str] = Field(default_factory=list, max_length=_LIST_LIMITS["achievements"], description="Max 3, only factual")
     technical_implementation: Optional[TechnicalImplementation] = None
     challenges: List[Challenge] = Field(default_factory=list, description="User-provided or inferred challenges")
-    next_steps: List[str] = Field(default_factory=list, description="Max 2")
+    next_steps: List[str] = Field(default_factory=list, max_length=_LIST_LIMITS["next_steps"], description="Max 2")
     tags: List[str] = Field(default_factory=list)
     priority: TaskPriority
     
-    @validator('achievements')
-    def limit_achievements(cls, v):
-        return v[:3]  # Hard limit
-    
-    @validator('next_steps')
-    def limit_next_steps(cls, v):
-        return v[:2]  # Hard limit
+    @field_validator('achievements', 'next_steps', mode='before')
+    @classmethod
+    def limit_lists(cls, v, info):
+        # Hard limits: trim LLM overflow instead of failing the whole parse
+        return v[:_LIST_LIMITS[info.field_name]] if isinstance(v, list) else v
 
-@tool
-def calculate_input_metrics(task_topic: str, details: str) -> Dict[str, Any]:
-    """Calculate input metrics for validation"""
+# Plain implementations are used on the hot path; the @tool wrappers below
+# keep them available to LangChain agents without per-call schema validation
+
+def _calculate_input_metrics_impl(task_topic: str, details: str) -> Dict[str, Any]:
+    """Word/char counts and a rough token estimate of the user input"""
     combined = f"{task_topic} {details}"
     word_count = len(combined.split())
     char_count = len(combined)
@@ -64,11 +69,23 @@ def calculate_input_metrics(task_topic: str, details: str) -> Dict[str, Any]:
         "estimated_tokens": word_count * 1.3  # Rough estimate
     }
 
-@tool
-def validate_generation(input_metrics: Dict, output_data: Dict, generation_time: float) -> GenerationMetrics:
-    """Validate AI generation quality"""
+def _content_text(value: Any) -> str:
+    """Field values of a generated entry as plain text, without keys or repr syntax"""
+    if isinstance(value, BaseModel):
+        value = [getattr(value, name) for name in type(value).model_fields]
+    elif isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(filter(None, (_content_text(v) for v in value)))
+    if isinstance(value, Enum):
+        return str(value.value)
+    return "" if value is None else str(value)
+
+def _validate_generation_impl(input_metrics: Dict, output_data: Union[WorkLogEntry, Dict[str, Any]],
+                              generation_time: float) -> GenerationMetrics:
+    """Score the generation by its output/input expansion ratio"""
     input_tokens = input_metrics["estimated_tokens"]
-    output_text = str(output_data)
+    output_text = _content_text(output_data)
     output_tokens = len(output_text.split()) * 1.3
     
     expansion_ratio = output_tokens / max(input_tokens, 1)
@@ -94,46 +111,73 @@ def validate_generation(input_metrics: Dict, output_data: Dict, generation_time:
     )
 
 @tool
-def extract_minimal_tags(task_topic: str, details: str, priority: str) -> List[str]:
-    """Extract only relevant tags, max 3"""
-    tags = []
+def calculate_input_metrics(task_topic: str, details: str) -> Dict[str, Any]:
+    """Calculate input metrics for validation"""
+    return _calculate_input_metrics_impl(task_topic, details)
+
+@tool
+def validate_generation(input_metrics: Dict, output_data: Union[WorkLogEntry, Dict[str, Any]],
+                        generation_time: float) -> GenerationMetrics:
+    """Validate AI generation quality"""
+    return _validate_generation_impl(input_metrics, output_data, generation_time)
+
+# Keyword -> tag, in selection priority order
+_TAG_MAPPING = {
+    "model": "machine-learning",
+    "api": "api-development",
+    "deploy": "deployment",
+    "data": "data-engineering",
+    "triton": "inference",
+    "yolo": "object-detection"
+}
+# Zero-width lookahead so overlapping keywords ("dataapi") are all found
+_TAG_RE = re.compile("(?=(" + "|".join(_TAG_MAPPING) + "))")
+
+def _extract_minimal_tags_impl(task_topic: str, details: str) -> List[str]:
+    """Core tag plus up to 2 keyword-derived tags"""
     text = f"{task_topic} {details}".lower()
     
-    # Core tag
-    tags.append("ml-engineering")
-    
-    # Priority-based tag selection (max 2 additional)
-    tag_mapping = {
-        "model": "machine-learning",
-        "api": "api-development",
-        "deploy": "deployment",
-        "data": "data-engineering",
-        "triton": "inference",
-        "yolo": "object-detection"
-    }
-    
-    for keyword, tag in tag_mapping.items():
-        if keyword in text and len(tags) < 3:
-            tags.append(tag)
+    # Single pass over the text, then keep mapping order (max 2 additional)
+    found = set(_TAG_RE.findall(text))
+    extra = [tag for keyword, tag in _TAG_MAPPING.items() if keyword in found]
     
-    return tags
+    # Core tag
+    return ["ml-engineering"] + extra[:2]
+
+@tool
+def extract_minimal_tags(task_topic: str, details: str, priority: str) -> List[str]:
+    """Extract only relevant tags, max 3"""
+    return _extract_minimal_tags_impl(task_topic, details)
+
+# Cheapest model and smallest output budget that fit each priority's entry;
+# lower temperature = less hallucination. 2.5-flash thinks by default and
+# thinking tokens count against max_output_tokens, which would truncate
+# the JSON under these caps, so thinking is off on those tiers
+_LLM_SETTINGS = {
+    TaskPriority.LOW: {"model": "gemini-2.5-flash-lite", "temperature": 0.1, "max_output_tokens": 512},
+    TaskPriority.MEDIUM: {"model": "gemini-2.5-flash", "temperature": 0.3, "max_output_tokens": 1024, "thinking_budget": 0},
+    TaskPriority.HIGH: {"model": "gemini-2.5-flash", "temperature": 0.3, "max_output_tokens": 2048, "thinking_budget": 0}
+}
 
 class ValidatedDocAgent:
     def __init__(self, api_key: str, full_name: str):
-        self.llm = ChatGoogleGenerativeAI(
-            model="gemini-2.5-flash",
-            google_api_key=api_key,
-            temperature=0.3,  # Lower temperature = less hallucination
-            max_output_tokens=2048,  # Reduced max length
-            convert_system_message_to_human=True
-        )
+        self.llms = {
+            priority: ChatGoogleGenerativeAI(
+                google_api_key=api_key,
+                convert_system_message_to_human=True,
+                **settings
+            )
+            for priority, settings in _LLM_SETTINGS.items()
+        }
         self.full_name = full_name
         self.parser = PydanticOutputParser(pydantic_object=WorkLogEntry)
+        # Schema text is invariant, serialize it once
+        self._format_instructions = self.parser.get_format_instructions()
         self._build_priority_prompts()
     
     def _build_priority_prompts(self):
         """Build different prompts based on priority"""
-        self.prompts = {
+        prompts = {
             TaskPriority.LOW: ChatPromptTemplate.from_messages([
                 ("system", """You are a minimal documentation assistant for {full_name}.
 Generate BRIEF work logs. Use ONLY information from user input.
@@ -167,6 +211,28 @@ Generate comprehensive logs but stay factual.
                 ("human", "Task: {task_topic}\nDetails: {details}\nChallenges: {challenges}\nPriority: HIGH")
             ])
         }
+        
+        # Pre-bind the per-agent constants so only task inputs vary per call
+        self.prompts = {
+            priority: prompt.partial(
+                full_name=self.full_name,
+                format_instructions=self._format_instructions
+            )
+            for priority, prompt in prompts.items()
+        }
+        
+        # Runnables are reusable, compose each priority's chain once
+        self.chains = {
+            priority: prompt | self.llms[priority] | self.parser
+            for priority, prompt in self.prompts.items()
+        }
+        
+        # Same prompts, parsed as partial JSON while the response streams
+        stream_parser = JsonOutputParser(pydantic_object=WorkLogEntry)
+        self.stream_chains = {
+            priority: prompt | self.llms[priority] | stream_parser
+            for priority, prompt in self.prompts.items()
+        }
     
     def generate_documentation(
         self, 
@@ -178,58 +244,105 @@ Generate comprehensive logs but stay factual.
     ) -> Dict[str, Any]:
         """Generate minimal, validated documentation"""
         
-        start_time = datetime.now()
+        start_time = time.perf_counter()
         
         # Calculate input metrics
-        input_metrics = calculate_input_metrics.invoke({
-            "task_topic": task_topic,
-            "details": details
-        })
+        input_metrics = _calculate_input_metrics_impl(task_topic, details)
         
         print(f"📊 Input: {input_metrics['word_count']} words, Priority: {priority.value}")
         
-        # Select prompt based on priority
-        prompt = self.prompts[priority]
+        # Select chain based on priority
+        chain = self.chains[priority]
         
-        # Build chain
-        chain = (
-            prompt 
-            | self.llm 
-            | self.parser
+        # Generate
+        result = chain.invoke(self._chain_inputs(task_topic, details, challenges))
+        
+        timestamp = datetime.now().isoformat(sep=" ", timespec="seconds")
+        return self._finalize(
+            result, task_topic, details, priority, input_metrics,
+            start_time, timestamp, validate
         )
+    
+    async def agenerate_documentation(
+        self, 
+        task_topic: str, 
+        details: str = "",
+        challenges: str = "",
+        priority: TaskPriority = TaskPriority.MEDIUM,
+        validate: bool = True,
+        on_title: Optional[Callable[[Dict[str, Any]], None]] = None
+    ) -> Dict[str, Any]:
+        """
+        Streaming variant of generate_documentation
         
-        # Generate
-        result = chain.invoke({
-            "full_name": self.full_name,
-            "task_topic": task_topic,
-            "details": details if details else "Not provided",
-            "challenges": challenges if challenges else "No challenges mentioned",
-            "format_instructions": self.parser.get_format_instructions()
-        })
+        on_title is called with the entry header (title, priority and
+        timestamp, shaped like the final output) as soon as the title is
+        complete, so the Docs header can be written while the rest decodes.
+        """
+        
+        start_time = time.perf_counter()
+        timestamp = datetime.now().isoformat(sep=" ", timespec="seconds")
+        
+        input_metrics = _calculate_input_metrics_impl(task_topic, details)
+        
+        print(f"📊 Input: {input_metrics['word_count']} words, Priority: {priority.value}")
+        
+        chain = self.stream_chains[priority]
+        partial: Dict[str, Any] = {}
+        title_sent = on_title is None
+        async for partial in chain.astream(self._chain_inputs(task_topic, details, challenges)):
+            # The title is final once the model has moved on to another key
+            if not title_sent and "title" in partial and next(reversed(partial)) != "title":
+                title_sent = True
+                on_title({
+                    "structured": WorkLogEntry.model_construct(title=partial["title"], priority=priority),
+                    "timestamp": timestamp
+                })
         
+        result = WorkLogEntry.model_validate({**partial, "priority": priority})
+        return self._finalize(
+            result, task_topic, details, priority, input_metrics,
+            start_time, timestamp, validate
+        )
+    
+    def _chain_inputs(self, task_topic: str, details: str, challenges: str) -> Dict[str, str]:
+        """Per-call prompt variables"""
+        return {
+            "task_topic": task_topic,
+            "details": details or "Not provided",
+            "challenges": challenges or "No challenges mentioned"
+        }
+    
+    def _finalize(
+        self,
+        result: WorkLogEntry,
+        task_topic: str,
+        details: str,
+        priority: TaskPriority,
+        input_metrics: Dict[str, Any],
+        start_time: float,
+        timestamp: str,
+        validate: bool
+    ) -> Dict[str, Any]:
+        """Attach metadata and validation metrics to a parsed entry"""
         # Add metadata
         result.priority = priority
-        result.tags = extract_minimal_tags.invoke({
-            "task_topic": task_topic,
-            "details": details,
-            "priority": priority.value
-        })
+        result.tags = _extract_minimal_tags_impl(task_topic, details)
         
-        generation_time = (datetime.now() - start_time).total_seconds()
+        generation_time = time.perf_counter() - start_time
         
+        # Hand the model on as-is; sinks that need a dict dump it themselves
         output = {
-            "structured": result.model_dump(),
-            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+            "structured": result,
+            "timestamp": timestamp,
             "status": "success"
         }
         
         # Validation metrics
         if validate:
-            metrics = validate_generation.invoke({
-                "input_metrics": input_metrics,
-                "output_data": output["structured"],
-                "generation_time": generation_time
-            })
+            metrics = _validate_generation_impl(
+                input_metrics, output["structured"], generation_time
+            )
             # Only return confidence and generation time for display
             output["metrics"] = {
                 "confidence_score": metrics.confidence_score,
@@ -280,8 +393,8 @@ if __name__ == "__main__":
             priority=test["priority"]
         )
         
-        print(f"\n📄 Generated {len(result['structured']['achievements'])} achievements")
-        print(f"🏷️  Tags: {result['structured']['tags']}")
+        print(f"\n📄 Generated {len(result['structured'].achievements)} achievements")
+        print(f"🏷️  Tags: {result['structured'].tags}")
         
         if "metrics" in result:
             m = result["metrics"]
@@ -1,12 +1,22 @@
 # FastAPI application for invoking agents and utilities
 from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
-from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.middleware.gzip import GZipMiddleware
+from fastapi.responses import ORJSONResponse, Response
+from pydantic import BaseModel, ConfigDict, Field
 from typing import Optional, List, Dict, Any
 from datetime import datetime
+import asyncio
+import json
+import logging
+import orjson
+import os
+import sys
+import time
 import uvicorn
+import anyio.to_thread
 from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from starlette.concurrency import run_in_threadpool
 
 from config import (
     GEMINI_API_KEY, 
@@ -14,16 +24,46 @@ from config import (
     SERVICE_ACCOUNT_FILE, 
     SCOPES, 
     DOC_ID,
-    FULL_NAME
+    FULL_NAME,
+    MAX_GEMINI_CONCURRENCY,
+    MAX_GEMINI_QUEUE,
+    PROMPT_CACHE_SIZE,
+    PROMPT_CACHE_SEMANTIC,
+    PROMPT_CACHE_THRESHOLD,
+    PROMPT_CACHE_EMBEDDING_MODEL
 )
-from agents.gemini_agent import ValidatedDocAgent
+from agents.gemini_agent import ValidatedDocAgent, TaskPriority
 from agents.docs_agent import DocsAgent
 from utils.page_manager import get_safe_insertion_point
+from utils.prompt_cache import PromptCache
+
+logger = logging.getLogger(__name__)
+
+_DOC_URL = f"https://docs.google.com/document/d/{DOC_ID}"
+
+_PRIORITY_MAP = {
+    "low": TaskPriority.LOW,
+    "medium": TaskPriority.MEDIUM,
+    "high": TaskPriority.HIGH
+}
+
+# Response timestamps are reformatted at most once per second
+_ts_cache = (0, "")
+
+def _now_iso() -> str:
+    """Current local time in ISO format, second resolution"""
+    global _ts_cache
+    second = int(time.time())
+    if _ts_cache[0] != second:
+        _ts_cache = (second, datetime.now().isoformat(timespec="seconds"))
+    return _ts_cache[1]
 
 # ==================== Request/Response Models ====================
 
 class DocumentationRequest(BaseModel):
     """Request model for generating and writing documentation"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+    
     topic: str = Field(..., description="Main work topic to document")
     related_topics: List[str] = Field(default_factory=list, description="Related topics or subtopics")
     priority: str = Field(default="medium", description="Priority level: low, medium, or high")
@@ -32,6 +72,8 @@ class DocumentationRequest(BaseModel):
 
 class DocumentationResponse(BaseModel):
     """Response model for documentation generation and writing"""
+    model_config = ConfigDict(extra="ignore", validate_assignment=False)
+    
     success: bool = Field(..., description="Whether the operation succeeded")
     message: str = Field(..., description="Status message")
     timestamp: str = Field(..., description="When the documentation was created")
@@ -40,22 +82,68 @@ class DocumentationResponse(BaseModel):
     metrics: Optional[Dict[str, Any]] = Field(None, description="Generation metrics for validation")
     content_preview: Optional[Dict[str, Any]] = Field(None, description="Preview of generated content")
 
+@dataclass(frozen=True)
+class _NormalizedRequest:
+    """DocumentationRequest with its derived strings computed once"""
+    topic: str
+    details: str  # details with the related topics appended
+    challenges: str
+    priority: TaskPriority
+    related: str
+    cache_key: str
+    
+    @classmethod
+    def from_request(cls, request: DocumentationRequest) -> "_NormalizedRequest":
+        related = ", ".join(request.related_topics)
+        if request.details and related:
+            details = f"{request.details} | Related topics: {related}"
+        elif related:
+            details = f"Related topics: {related}"
+        else:
+            details = request.details
+        
+        return cls(
+            topic=request.topic,
+            details=details,
+            challenges=request.challenges,
+            priority=_PRIORITY_MAP.get(request.priority.lower(), TaskPriority.MEDIUM),
+            related=related,
+            cache_key=json.dumps(
+                [request.topic, request.related_topics, request.details, request.challenges],
+                ensure_ascii=False
+            )
+        )
+
 # ==================== Global Agent Instances ====================
 
 gemini_agent = None
 docs_agent = None
+prompt_cache = PromptCache(PROMPT_CACHE_SIZE, PROMPT_CACHE_THRESHOLD, PROMPT_CACHE_EMBEDDING_MODEL)
+
+# Caps concurrent Gemini calls; _gemini_waiting counts requests queued
+# for a slot (reported by /health, bounded by MAX_GEMINI_QUEUE)
+_gemini_slots = asyncio.Semaphore(MAX_GEMINI_CONCURRENCY)
+_gemini_waiting = 0
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """Initialize agents on startup"""
     global gemini_agent, docs_agent
     
+    # Gemini and Docs calls run in worker threads; the default of 40 is
+    # too low when most of them are waiting on the network
+    anyio.to_thread.current_default_thread_limiter().total_tokens = 64
+    
     try:
         print("🚀 Initializing agents...")
         gemini_agent = ValidatedDocAgent(GEMINI_API_KEY, FULL_NAME)
         docs_agent = DocsAgent(SERVICE_ACCOUNT_FILE, SCOPES)
         print("✅ Agents initialized successfully!")
         print(f"📧 Service Account: {docs_agent.sa_email}")
+        docs_agent.open_http_client()
+        docs_agent.start_writer()
+        if PROMPT_CACHE_SEMANTIC and await run_in_threadpool(prompt_cache.load_embedder):
+            print("✅ Semantic prompt cache ready")
     except Exception as e:
         print(f"❌ Failed to initialize agents: {e}")
         raise
@@ -63,6 +151,8 @@ async def lifespan(app: FastAPI):
     yield
     
     print("🛑 Shutting down agents...")
+    await docs_agent.stop_writer()
+    await docs_agent.close_http_client()
 
 # ==================== FastAPI App ====================
 
@@ -70,13 +160,104 @@ app = FastAPI(
     title="Docify Generator",
     description="Single endpoint to generate and write documentation to Google Docs",
     version="1.0.0",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
 # ==================== CORS Configuration ====================
 
+class PureASGICORS:
+    """
+    CORS middleware working directly on ASGI messages
+    
+    Header values are encoded once at startup. Preflight requests are
+    answered without reaching the app; other responses only get CORS
+    headers appended to their http.response.start message.
+    """
+    
+    ALLOW_METHODS = b"DELETE, GET, HEAD, OPTIONS, PATCH, POST, PUT"
+    
+    def __init__(self, app, allow_origins: List[str], allow_credentials: bool = False, max_age: int = 600):
+        self.app = app
+        self.allow_all_origins = "*" in allow_origins
+        self.allow_origins = {origin.encode("latin-1") for origin in allow_origins}
+        self.allow_credentials = allow_credentials
+        self.max_age = str(max_age).encode("latin-1")
+    
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        
+        origin = request_method = request_headers = None
+        for name, value in scope["headers"]:
+            if name == b"origin":
+                origin = value
+            elif name == b"access-control-request-method":
+                request_method = value
+            elif name == b"access-control-request-headers":
+                request_headers = value
+        
+        if origin is None:
+            await self.app(scope, receive, send)
+            return
+        
+        cors_headers = self._cors_headers(origin)
+        
+        if scope["method"] == "OPTIONS" and request_method is not None:
+            await self._preflight(send, cors_headers, request_headers)
+            return
+        
+        if not cors_headers:
+            await self.app(scope, receive, send)
+            return
+        
+        async def send_with_cors(message):
+            if message["type"] == "http.response.start":
+                message["headers"] = list(message.get("headers", [])) + cors_headers
+            await send(message)
+        
+        await self.app(scope, receive, send_with_cors)
+    
+    def _cors_headers(self, origin: bytes) -> List[tuple]:
+        """Allow-origin headers for an origin, empty if it is not allowed"""
+        if self.allow_all_origins and not self.allow_credentials:
+            return [(b"access-control-allow-origin", b"*")]
+        if not self.allow_all_origins and origin not in self.allow_origins:
+            return []
+        # Credentialed responses must echo the origin rather than use "*"
+        headers = [(b"access-control-allow-origin", origin), (b"vary", b"Origin")]
+        if self.allow_credentials:
+            headers.append((b"access-control-allow-credentials", b"true"))
+        return headers
+    
+    async def _preflight(self, send, cors_headers: List[tuple], request_headers: Optional[bytes]):
+        """Answer an OPTIONS preflight directly"""
+        if not cors_headers:
+            body = b"Disallowed CORS origin"
+            await send({
+                "type": "http.response.start",
+                "status": 400,
+                "headers": [
+                    (b"content-type", b"text/plain; charset=utf-8"),
+                    (b"content-length", str(len(body)).encode("latin-1"))
+                ]
+            })
+            await send({"type": "http.response.body", "body": body})
+            return
+        
+        headers = cors_headers + [
+            (b"access-control-allow-methods", self.ALLOW_METHODS),
+            (b"access-control-max-age", self.max_age)
+        ]
+        if request_headers:
+            # All headers are allowed, so mirror what the browser asked for
+            headers.append((b"access-control-allow-headers", request_headers))
+        await send({"type": "http.response.start", "status": 204, "headers": headers})
+        await send({"type": "http.response.body", "body": b""})
+
 app.add_middleware(
-    CORSMiddleware,
+    PureASGICORS,
     allow_origins=[
         "http://localhost:3000",      # React dev server
         "http://127.0.0.1:3000",
@@ -85,10 +266,11 @@ app.add_middleware(
         "*"                            # Allow all origins (for development)
     ],
     allow_credentials=True,
-    allow_methods=["*"],              # Allow all methods (GET, POST, OPTIONS, etc.)
-    allow_headers=["*"],              # Allow all headers
 )
 
+# Only bodies over 1 KB (i.e. /generate results) are compressed
+app.add_middleware(GZipMiddleware, minimum_size=1024, compresslevel=5)
+
 # ==================== Main Endpoint ====================
 
 @app.post("/generate", response_model=DocumentationResponse, tags=["Documentation"])
@@ -108,6 +290,10 @@ async def generate_and_write_documentation(request: DocumentationRequest):
     Returns:
         DocumentationResponse with document URL and success status
     """
+    return DocumentationResponse(**await _generate_and_write(request))
+
+async def _generate_and_write(request: DocumentationRequest) -> Dict[str, Any]:
+    """Shared body of /generate and /fast/generate, returns the response fields"""
     if not gemini_agent or not docs_agent:
         raise HTTPException(
             status_code=503,
@@ -116,133 +302,185 @@ async def generate_and_write_documentation(request: DocumentationRequest):
     
     try:
         # Combine topic, details, and related topics for better documentation
-        combined_details = request.details if request.details else ""
-        if request.related_topics:
-            if combined_details:
-                combined_details += f" | Related topics: {', '.join(request.related_topics)}"
-            else:
-                combined_details = f"Related topics: {', '.join(request.related_topics)}"
+        norm = _NormalizedRequest.from_request(request)
         
-        print(f"📝 Generating documentation for: {request.topic}")
-        print(f"📊 Priority: {request.priority.upper()}")
-        if request.related_topics:
-            print(f"📌 Related topics: {', '.join(request.related_topics)}")
-        if request.details:
-            print(f"📋 Details: {request.details}")
-        if request.challenges:
-            print(f"⚠️  Challenges: {request.challenges}")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("📝 Generating documentation for: %s", norm.topic)
+            logger.info("📊 Priority: %s", request.priority.upper())
+            if norm.related:
+                logger.info("📌 Related topics: %s", norm.related)
+            if request.details:
+                logger.info("📋 Details: %s", request.details)
+            if request.challenges:
+                logger.info("⚠️  Challenges: %s", request.challenges)
         
         # Step 1: Generate content using Gemini with priority
-        from agents.gemini_agent import TaskPriority
-        priority_map = {
-            "low": TaskPriority.LOW,
-            "medium": TaskPriority.MEDIUM,
-            "high": TaskPriority.HIGH
-        }
-        
-        doc_data = gemini_agent.generate_documentation(
-            request.topic, 
-            combined_details,
-            challenges=request.challenges,
-            priority=priority_map.get(request.priority.lower(), TaskPriority.MEDIUM)
-        )
+        cached = await run_in_threadpool(prompt_cache.get, norm.cache_key, norm.priority.value)
+        if cached is not None:
+            logger.info("⚡ Prompt cache hit")
+            doc_data = {**cached, "timestamp": datetime.now().isoformat(sep=" ", timespec="seconds")}
+        else:
+            doc_data = await _generate_throttled(norm)
+            await run_in_threadpool(prompt_cache.put, norm.cache_key, doc_data, norm.priority.value)
         
-        print("✍️  Writing to Google Docs...")
+        logger.info("✍️  Writing to Google Docs...")
         
         # Step 2: Write to Google Docs
-        success = docs_agent.write_entry(DOC_ID, doc_data)
+        # Queued entries are merged into batched batchUpdate calls
+        success = await (await docs_agent.enqueue_entry(DOC_ID, doc_data))
         
         if success:
-            return DocumentationResponse(
-                success=True,
-                message="✅ Documentation generated and written to Google Docs successfully!",
-                timestamp=doc_data.get("timestamp", datetime.now().isoformat()),
-                doc_url=f"https://docs.google.com/document/d/{DOC_ID}",
-                structured=doc_data.get("structured", {}),
-                metrics=doc_data.get("metrics"),
-                content_preview={
-                    "title": doc_data.get("structured", {}).get("title"),
-                    "summary": doc_data.get("structured", {}).get("summary"),
-                    "key_achievements": doc_data.get("structured", {}).get("achievements", [])
+            entry = doc_data["structured"]
+            return {
+                "success": True,
+                "message": "✅ Documentation generated and written to Google Docs successfully!",
+                "timestamp": doc_data.get("timestamp") or _now_iso(),
+                "doc_url": _DOC_URL,
+                "structured": entry.model_dump(),
+                "metrics": doc_data.get("metrics"),
+                "content_preview": {
+                    "title": entry.title,
+                    "summary": entry.summary,
+                    "key_achievements": entry.achievements
                 }
-            )
+            }
         else:
             raise HTTPException(
                 status_code=500,
                 detail="Failed to write documentation to Google Docs. Check permissions."
             )
             
+    except HTTPException:
+        raise
     except Exception as e:
-        print(f"❌ Error generating documentation: {e}")
+        logger.error("❌ Error generating documentation: %s", e)
         raise HTTPException(status_code=500, detail=f"Documentation generation failed: {str(e)}")
 
+async def _generate_throttled(norm: _NormalizedRequest) -> Dict[str, Any]:
+    """Run the Gemini call once a slot is free, or answer 429 if the queue is full"""
+    global _gemini_waiting
+    if _gemini_waiting >= MAX_GEMINI_QUEUE:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many documentation requests queued. Retry shortly."
+        )
+    
+    _gemini_waiting += 1
+    try:
+        await _gemini_slots.acquire()
+    finally:
+        _gemini_waiting -= 1
+    
+    try:
+        return await run_in_threadpool(
+            gemini_agent.generate_documentation,
+            norm.topic,
+            norm.details,
+            challenges=norm.challenges,
+            priority=norm.priority
+        )
+    finally:
+        _gemini_slots.release()
+
+# ==================== Fast Path ====================
+
+# Same endpoint without response_model validation: the handler returns a
+# Response, so FastAPI skips serialization and the dict goes straight to
+# orjson. Registered on the main app so it passes through no extra layers.
+@app.post("/fast/generate", response_model=None, response_class=ORJSONResponse, tags=["Documentation"])
+async def fast_generate_and_write_documentation(request: DocumentationRequest) -> ORJSONResponse:
+    """/generate without the response model, for RPC-style callers"""
+    return ORJSONResponse(await _generate_and_write(request))
+
 # ==================== Info Endpoints ====================
 
+# Both bodies are encoded ahead of time; /health is re-encoded at most
+# once per second or when readiness or the Gemini queue depth changes
+_ROOT_BYTES = orjson.dumps({
+    "name": "Docify Generator",
+    "version": "1.0.0",
+    "description": "Generate documentation with one endpoint",
+    "usage": {
+        "endpoint": "POST /generate",
+        "example": {
+            "topic": "Your work topic",
+            "related_topics": ["subtopic1", "subtopic2"]
+        }
+    },
+    "documentation": "http://localhost:8000/docs"
+})
+
+_health_cache = (0.0, None, b"")
+
 @app.get("/", tags=["Info"])
 async def root():
     """Welcome endpoint"""
-    return {
-        "name": "Docify Generator",
-        "version": "1.0.0",
-        "description": "Generate documentation with one endpoint",
-        "usage": {
-            "endpoint": "POST /generate",
-            "example": {
-                "topic": "Your work topic",
-                "related_topics": ["subtopic1", "subtopic2"]
-            }
-        },
-        "documentation": "http://localhost:8000/docs"
-    }
+    return Response(_ROOT_BYTES, media_type="application/json")
 
 @app.get("/health", tags=["Info"])
 async def health_check():
     """Check API and agents health"""
-    return {
-        "status": "healthy" if gemini_agent and docs_agent else "degraded",
-        "agents_ready": bool(gemini_agent and docs_agent),
-        "timestamp": datetime.now().isoformat()
-    }
+    global _health_cache
+    ready = bool(gemini_agent and docs_agent)
+    state = (ready, _gemini_waiting)
+    built_at, cached_state, body = _health_cache
+    now = time.monotonic()
+    if cached_state != state or now - built_at > 1.0:
+        body = orjson.dumps({
+            "status": "healthy" if ready else "degraded",
+            "agents_ready": ready,
+            "gemini_queue_depth": _gemini_waiting,
+            "timestamp": _now_iso()
+        })
+        _health_cache = (now, state, body)
+    return Response(body, media_type="application/json")
 
 # ==================== Error Handlers ====================
 
 @app.exception_handler(HTTPException)
 async def http_exception_handler(request, exc):
     """Custom HTTP exception handler"""
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=exc.status_code,
         content={
             "success": False,
             "error": exc.detail,
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
     )
 
 @app.exception_handler(Exception)
 async def general_exception_handler(request, exc):
     """Handle unexpected exceptions"""
-    print(f"❌ Unexpected error: {exc}")
-    return JSONResponse(
+    logger.error("❌ Unexpected error: %s", exc)
+    return ORJSONResponse(
         status_code=500,
         content={
             "success": False,
             "error": "Internal server error",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": _now_iso()
         }
     )
 
 # ==================== Startup ====================
 
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
     print("🚀 Starting Docify Generator...")
     print("📚 API Documentation: http://localhost:8000/docs")
     print("📝 Main Endpoint: POST http://localhost:8000/generate")
     print()
     
+    # Each worker keeps its own cached end index per doc, so several
+    # workers appending to one doc would race; opt in via DOCIFY_WORKERS
     uvicorn.run(
-        app,
+        "api:app",
         host="0.0.0.0",
         port=8000,
-        reload=True,
-        log_level="info"
+        reload=False,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
+        workers=int(os.getenv("DOCIFY_WORKERS", "1")),
+        log_level="warning",
+        access_log=False
     )
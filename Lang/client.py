@@ -1,6 +1,10 @@
 # Simple Python client for Docify Generator API
 
+import asyncio
+import httpx
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from typing import Optional, Dict, Any, List
 
 class DocifyClient:
@@ -9,6 +13,17 @@ class DocifyClient:
     def __init__(self, base_url: str = "http://localhost:8000"):
         self.base_url = base_url
         self.session = requests.Session()
+        
+        # Larger keep-alive pool for parallel callers; Retry's default
+        # allowed_methods leave POST out, so /generate (which writes to
+        # the doc) is never replayed
+        adapter = HTTPAdapter(
+            pool_connections=32,
+            pool_maxsize=32,
+            max_retries=Retry(total=3, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
     
     def generate(
         self,
@@ -44,6 +59,67 @@ class DocifyClient:
         return response.json()
 
 
+class AsyncDocifyClient:
+    """
+    Async client for Docify Generator API
+    
+    Use as an async context manager so the pooled HTTP/2 connection is
+    shared across calls and closed afterwards.
+    """
+    
+    def __init__(self, base_url: str = "http://localhost:8000", max_concurrency: int = 16):
+        self.base_url = base_url
+        self.max_concurrency = max_concurrency
+        self._client: Optional[httpx.AsyncClient] = None
+    
+    async def __aenter__(self) -> "AsyncDocifyClient":
+        self._client = httpx.AsyncClient(base_url=self.base_url, http2=True, timeout=300)
+        return self
+    
+    async def __aexit__(self, *exc_info):
+        await self._client.aclose()
+        self._client = None
+    
+    async def generate(
+        self,
+        topic: str,
+        related_topics: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Generate documentation and write to Google Docs, see DocifyClient.generate"""
+        payload = {
+            "topic": topic,
+            "related_topics": related_topics or []
+        }
+        
+        response = await self._client.post("/generate", json=payload)
+        response.raise_for_status()
+        return response.json()
+    
+    async def generate_many(self, items: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generate documentation for several topics concurrently
+        
+        Args:
+            items: generate() keyword arguments, one dict per topic
+            
+        Returns:
+            Responses in the same order as items
+        """
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        
+        async def run(item: Dict[str, Any]) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.generate(**item)
+        
+        return await asyncio.gather(*(run(item) for item in items))
+    
+    async def health_check(self) -> Dict[str, Any]:
+        """Check if API is running"""
+        response = await self._client.get("/health")
+        response.raise_for_status()
+        return response.json()
+
+
 # ==================== Usage Examples ====================
 
 if __name__ == "__main__":
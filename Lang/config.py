@@ -13,6 +13,19 @@ SCOPES = ["https://www.googleapis.com/auth/documents"]
 GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MODEL_NAME = "gemini-1.5-flash"
 
+# Concurrent Gemini calls per API process, and how many more requests
+# may wait for a slot before /generate answers 429
+MAX_GEMINI_CONCURRENCY = int(os.getenv("MAX_GEMINI_CONCURRENCY", "8"))
+MAX_GEMINI_QUEUE = int(os.getenv("MAX_GEMINI_QUEUE", "64"))
+
+# Prompt cache. The semantic tier is opt-in: near-identical tasks (e.g.
+# the same fix on two endpoints) can clear the threshold and would reuse
+# another task's documentation
+PROMPT_CACHE_SIZE = 1024
+PROMPT_CACHE_SEMANTIC = os.getenv("PROMPT_CACHE_SEMANTIC", "").lower() in ("1", "true", "yes")
+PROMPT_CACHE_THRESHOLD = 0.92
+PROMPT_CACHE_EMBEDDING_MODEL = os.getenv("PROMPT_CACHE_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2")
+
 # Doc settings
 FULL_NAME = "Lakshmi Naresh Chikkala"
 SURNAME = "Chikkala"
@@ -1,5 +1,5 @@
 # Entry point & CLI for LangChain version
-from config import *
+from config import GEMINI_API_KEY, MODEL_NAME, SERVICE_ACCOUNT_FILE, SCOPES, DOC_ID
 from agents.gemini_agent import LangChainGeminiAgent
 from agents.docs_agent import DocsAgent
 
@@ -1,12 +1,16 @@
 # Test suite for Docify API
 
+import asyncio
+import threading
+import httpx
 import pytest
 from fastapi.testclient import TestClient
 from unittest.mock import Mock, patch, MagicMock
 from datetime import datetime
 
 # Import the app - will need to modify for testing
-from api import app
+import api
+from api import app, PureASGICORS
 
 client = TestClient(app)
 
@@ -238,21 +242,133 @@ def test_end_to_end_documentation_generation(mock_docs, mock_gemini):
     mock_gemini.generate_work_documentation.assert_called_once()
     mock_docs.write_daily_entry.assert_called_once()
 
+# ==================== CORS Tests ====================
+
+async def _plain_app(scope, receive, send):
+    """Bare ASGI app for exercising PureASGICORS on its own"""
+    await send({
+        "type": "http.response.start",
+        "status": 200,
+        "headers": [(b"content-type", b"text/plain"), (b"x-app", b"1")]
+    })
+    await send({"type": "http.response.body", "body": b"ok"})
+
+cors_client = TestClient(PureASGICORS(
+    _plain_app,
+    allow_origins=["http://localhost:3000"],
+    allow_credentials=True
+))
+
+def test_cors_preflight_allowed_origin():
+    """Preflight from a listed origin is answered without reaching the app"""
+    response = cors_client.options(
+        "/generate",
+        headers={
+            "Origin": "http://localhost:3000",
+            "Access-Control-Request-Method": "POST",
+            "Access-Control-Request-Headers": "content-type"
+        }
+    )
+    
+    assert response.status_code == 204
+    assert response.headers["access-control-allow-origin"] == "http://localhost:3000"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert "POST" in response.headers["access-control-allow-methods"]
+    assert response.headers["access-control-allow-headers"] == "content-type"
+    assert "x-app" not in response.headers
+
+def test_cors_disallowed_origin():
+    """Unlisted origins get a 400 preflight and no CORS headers on requests"""
+    preflight = cors_client.options(
+        "/generate",
+        headers={"Origin": "http://evil.example", "Access-Control-Request-Method": "POST"}
+    )
+    assert preflight.status_code == 400
+    assert "access-control-allow-origin" not in preflight.headers
+    
+    response = cors_client.get("/", headers={"Origin": "http://evil.example"})
+    assert response.status_code == 200
+    assert "access-control-allow-origin" not in response.headers
+    assert "access-control-allow-credentials" not in response.headers
+
+def test_cors_wildcard_with_credentials_echoes_origin():
+    """With "*" and credentials the app echoes the origin and varies on it"""
+    response = client.get("/health", headers={"Origin": "http://example.com"})
+    
+    assert response.status_code == 200
+    assert response.headers["access-control-allow-origin"] == "http://example.com"
+    assert response.headers["access-control-allow-credentials"] == "true"
+    assert "Origin" in response.headers.get_list("vary")
+
+def test_cors_no_origin_passes_through():
+    """Requests without an Origin header reach the app untouched"""
+    response = cors_client.get("/")
+    
+    assert response.status_code == 200
+    assert response.text == "ok"
+    assert response.headers["x-app"] == "1"
+    assert not any(name.startswith("access-control-") for name in response.headers)
+    assert "vary" not in response.headers
+
 # ==================== Performance Tests ====================
 
-def test_concurrent_requests():
+@pytest.mark.anyio
+async def test_concurrent_requests():
     """Test handling of concurrent requests"""
-    import concurrent.futures
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as ac:
+        results = await asyncio.gather(*(ac.get("/health") for _ in range(10)))
+    
+    assert all(r.status_code == 200 for r in results)
+    assert len(results) == 10
+
+@pytest.mark.anyio
+async def test_generate_queue_overflow_returns_429():
+    """Requests beyond the Gemini slots plus queue are refused with 429"""
+    release = threading.Event()
+    structured = Mock(title="T", summary="S", achievements=[])
+    structured.model_dump.return_value = {"title": "T"}
     
-    def make_request():
-        return client.get("/health")
+    def blocking_generate(*args, **kwargs):
+        release.wait(timeout=10)
+        return {"structured": structured, "timestamp": "2026-01-01 00:00:00"}
     
-    with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-        futures = [executor.submit(make_request) for _ in range(10)]
-        results = [f.result() for f in concurrent.futures.as_completed(futures)]
+    async def enqueue_entry(doc_id, doc_data):
+        return asyncio.sleep(0, result=True)
+    
+    mock_gemini = Mock()
+    mock_gemini.generate_documentation.side_effect = blocking_generate
+    mock_docs = Mock()
+    mock_docs.enqueue_entry = enqueue_entry
+    mock_cache = Mock()
+    mock_cache.get.return_value = None
+    capacity = api.MAX_GEMINI_CONCURRENCY + api.MAX_GEMINI_QUEUE
+    
+    with patch('api.gemini_agent', mock_gemini), \
+         patch('api.docs_agent', mock_docs), \
+         patch('api.prompt_cache', mock_cache), \
+         patch('api._gemini_slots', asyncio.Semaphore(api.MAX_GEMINI_CONCURRENCY)):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test", timeout=30) as ac:
+            payload = {"topic": "Queue test", "details": "Fill every slot"}
+            pending = [asyncio.ensure_future(ac.post("/generate", json=payload)) for _ in range(capacity)]
+            
+            # Wait until every slot is taken and the queue is full
+            for _ in range(500):
+                if api._gemini_waiting == api.MAX_GEMINI_QUEUE:
+                    break
+                await asyncio.sleep(0.01)
+            assert api._gemini_waiting == api.MAX_GEMINI_QUEUE
+            
+            overflow = await ac.post("/generate", json=payload)
+            assert overflow.status_code == 429
+            assert overflow.json()["success"] == False
+            
+            release.set()
+            results = await asyncio.gather(*pending)
     
     assert all(r.status_code == 200 for r in results)
-    assert len(results) == 10
+    assert api._gemini_waiting == 0
 
 # ==================== Test Fixtures ====================
 
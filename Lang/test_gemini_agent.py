@@ -0,0 +1,19 @@
+# Tests for the Gemini agent's helper functions
+
+from agents.gemini_agent import _extract_minimal_tags_impl
+
+# ==================== Tag Extraction Tests ====================
+
+def test_tags_core_only():
+    """Text without keywords gets only the core tag"""
+    assert _extract_minimal_tags_impl("Wrote notes", "") == ["ml-engineering"]
+
+def test_tags_follow_mapping_order():
+    """Extra tags keep mapping order, capped at 2"""
+    tags = _extract_minimal_tags_impl("Deploy YOLO model", "via Triton API")
+    assert tags == ["ml-engineering", "machine-learning", "api-development"]
+
+def test_tags_overlapping_keywords():
+    """Keywords sharing characters are all found ("datapipeline" holds "data" and "api")"""
+    tags = _extract_minimal_tags_impl("Built DataPipeline service", "")
+    assert tags == ["ml-engineering", "api-development", "data-engineering"]
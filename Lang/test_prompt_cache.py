@@ -0,0 +1,61 @@
+# Tests for the prompt cache in front of Gemini
+
+from utils.prompt_cache import PromptCache
+
+# ==================== Exact Tier Tests ====================
+
+def test_exact_hit_and_miss():
+    """Only the same request text hits"""
+    cache = PromptCache(max_entries=4)
+    cache.put("Fixed bug in /predict endpoint", {"title": "predict"})
+    assert cache.get("Fixed bug in /predict endpoint") == {"title": "predict"}
+    assert cache.get("Fixed bug in /train endpoint") is None
+
+def test_semantic_tier_off_by_default():
+    """Without load_embedder() only exact matches are served"""
+    cache = PromptCache(max_entries=4)
+    assert not cache.semantic
+
+def test_put_replaces_existing_entry():
+    """Storing the same text again overwrites without growing the cache"""
+    cache = PromptCache(max_entries=4)
+    cache.put("topic", {"v": 1})
+    cache.put("topic", {"v": 2})
+    assert cache.get("topic") == {"v": 2}
+    assert len(cache) == 1
+
+# ==================== Eviction Tests ====================
+
+def test_evicts_least_recently_used():
+    """A full cache drops the entry used longest ago"""
+    cache = PromptCache(max_entries=2)
+    cache.put("a", {"v": "a"})
+    cache.put("b", {"v": "b"})
+    assert cache.get("a") == {"v": "a"}  # "b" is now the oldest
+    cache.put("c", {"v": "c"})
+    
+    assert len(cache) == 2
+    assert cache.get("b") is None
+    assert cache.get("a") == {"v": "a"}
+    assert cache.get("c") == {"v": "c"}
+
+def test_evicted_slot_is_reused():
+    """New entries take over the evicted slot instead of growing past the limit"""
+    cache = PromptCache(max_entries=2)
+    for i in range(5):
+        cache.put(f"topic {i}", {"v": i})
+    assert len(cache) == 2
+    assert cache.get("topic 3") == {"v": 3}
+    assert cache.get("topic 4") == {"v": 4}
+
+# ==================== Namespace Tests ====================
+
+def test_namespaces_are_isolated():
+    """The same text in another namespace (e.g. priority) is a separate entry"""
+    cache = PromptCache(max_entries=4)
+    cache.put("topic", {"v": "low"}, namespace="low")
+    assert cache.get("topic", namespace="high") is None
+    
+    cache.put("topic", {"v": "high"}, namespace="high")
+    assert cache.get("topic", namespace="low") == {"v": "low"}
+    assert cache.get("topic", namespace="high") == {"v": "high"}
@@ -9,11 +9,10 @@ def get_safe_insertion_point(doc: Dict) -> int:
     if len(body) < 2:
         return 1
     
-    # Find last paragraph and insert at its start
-    for element in reversed(body):
-        if element.get("paragraph"):
-            return element.get("startIndex", 1)
-    
-    # Fallback: document body end - 1
-    end_index = body[-1].get("endIndex", 1)
-    return max(1, end_index - 1)
+    # Insert at the start of the last paragraph, falling back to
+    # document body end - 1
+    last = body[-1]
+    return next(
+        (element.get("startIndex", 1) for element in reversed(body) if "paragraph" in element),
+        max(1, last.get("endIndex", 1) - 1)
+    )
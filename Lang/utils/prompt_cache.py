@@ -0,0 +1,119 @@
+# Exact + semantic cache for generated documentation
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+
+class PromptCache:
+    """
+    Two-tier in-process cache in front of the Gemini call
+
+    Tier 1 is an exact match on a blake2b digest of the request text.
+    Tier 2 is opt-in: after load_embedder() succeeds (it needs
+    sentence-transformers), request embeddings are kept in a fixed-size
+    matrix and a lookup returns the closest entry whose cosine similarity
+    reaches the threshold.
+    Entries are namespaced (e.g. by priority) and evicted LRU.
+    """
+
+    def __init__(self, max_entries: int = 1024, threshold: float = 0.92,
+                 model_name: str = "sentence-transformers/all-MiniLM-L6-v2"):
+        self.max_entries = max_entries
+        self.threshold = threshold
+        self.model_name = model_name
+
+        # digest -> (slot, doc_data), oldest first
+        self._entries: "OrderedDict[bytes, Tuple[int, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        # Semantic tier, filled in by load_embedder()
+        self._embedder = None
+        self._np = None
+        self._matrix = None
+        self._slot_keys = [None] * max_entries
+        self._slot_ns = None
+        self._namespaces: Dict[str, int] = {}
+
+    @property
+    def semantic(self) -> bool:
+        return self._embedder is not None
+
+    def load_embedder(self) -> bool:
+        """Load the embedding model; on failure only the exact tier is used"""
+        try:
+            import numpy as np
+            from sentence_transformers import SentenceTransformer
+
+            embedder = SentenceTransformer(self.model_name)
+            dim = embedder.get_sentence_embedding_dimension()
+        except Exception as e:
+            print(f"⚠️  Semantic prompt cache disabled: {e}")
+            return False
+
+        with self._lock:
+            self._np = np
+            self._matrix = np.zeros((self.max_entries, dim), dtype=np.float32)
+            self._slot_ns = np.full(self.max_entries, -1, dtype=np.int32)
+            self._embedder = embedder
+            # Entries cached before the model was loaded have no embedding
+            self._entries.clear()
+            self._slot_keys = [None] * self.max_entries
+        return True
+
+    def get(self, key_text: str, namespace: str = "") -> Optional[Dict[str, Any]]:
+        """Return cached doc_data for the request text, or None"""
+        digest = self._digest(key_text, namespace)
+
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                self._entries.move_to_end(digest)
+                return entry[1]
+            if not self._embedder or not self._entries:
+                return None
+
+        query = self._embed(key_text)
+
+        with self._lock:
+            ns_id = self._namespaces.get(namespace)
+            if ns_id is None:
+                return None
+            scores = self._matrix @ query
+            scores[self._slot_ns != ns_id] = -1.0
+            slot = int(scores.argmax())
+            if scores[slot] < self.threshold:
+                return None
+            digest = self._slot_keys[slot]
+            self._entries.move_to_end(digest)
+            return self._entries[digest][1]
+
+    def put(self, key_text: str, doc_data: Dict[str, Any], namespace: str = "") -> None:
+        """Store doc_data for the request text"""
+        digest = self._digest(key_text, namespace)
+        embedding = self._embed(key_text) if self._embedder else None
+
+        with self._lock:
+            if digest in self._entries:
+                slot = self._entries[digest][0]
+                self._entries.move_to_end(digest)
+            elif len(self._entries) >= self.max_entries:
+                _, (slot, _) = self._entries.popitem(last=False)
+            else:
+                slot = len(self._entries)
+
+            self._entries[digest] = (slot, doc_data)
+            self._slot_keys[slot] = digest
+            if embedding is not None and self._matrix is not None:
+                self._matrix[slot] = embedding
+                self._slot_ns[slot] = self._namespaces.setdefault(namespace, len(self._namespaces))
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @staticmethod
+    def _digest(key_text: str, namespace: str) -> bytes:
+        return hashlib.blake2b(f"{namespace}\0{key_text}".encode("utf-8"), digest_size=16).digest()
+
+    def _embed(self, key_text: str):
+        # Normalized embeddings make the dot product the cosine similarity
+        return self._embedder.encode(key_text, normalize_embeddings=True).astype(self._np.float32)
@@ -1,4 +1,6 @@
+import asyncio
 import json
+import threading
 from google.oauth2.service_account import Credentials
 from googleapiclient.discovery import build
 from googleapiclient.errors import HttpError
@@ -8,13 +10,26 @@ from datetime import datetime
 from config import SECTION_EMOJIS, STYLE_CONFIG
 from utils.formatting import (create_heading_style, create_styled_text, 
                               create_bullet_list, create_divider, create_code_block)
-from utils.page_manager import get_safe_insertion_point, create_page_break
+from utils.page_manager import (get_safe_insertion_point, create_page_break, ETaggedDocCache,
+                                calculate_content_length, inserted_length)
+
+def _is_revision_conflict(error: HttpError) -> bool:
+    """Whether batchUpdate rejected writeControl.requiredRevisionId as stale"""
+    if error.resp.status != 400:
+        return False
+    content = error.content.decode("utf-8", "replace") if isinstance(error.content, bytes) else str(error.content)
+    return "FAILED_PRECONDITION" in content or "revision" in content.lower()
 
 class DocsAgent:
     def __init__(self, service_account_file: str, scopes: List[str]):
         self.service_account_file = service_account_file
         self.scopes = scopes
         self.service, self.sa_email = self._init_service()
+        # Insertion cursor and revision per document, so only the first
+        # entry (or one after a conflicting edit) fetches the doc
+        self._docs = ETaggedDocCache(self.service)
+        # Writes share the cursors above, so callers on any thread take turns
+        self._write_lock = threading.Lock()
     
     def _init_service(self):
         if not os.path.exists(self.service_account_file):
@@ -29,36 +44,63 @@ class DocsAgent:
     
     def write_daily_entry(self, doc_id: str, doc_data: Dict) -> bool:
         """Write beautifully formatted documentation to Google Docs"""
+        with self._write_lock:
+            return self._write_daily_entry(doc_id, doc_data)
+    
+    def _write_daily_entry(self, doc_id: str, doc_data: Dict) -> bool:
         try:
-            # Get document and find safe insertion point
-            doc = self.service.documents().get(documentId=doc_id).execute()
-            safe_index = get_safe_insertion_point(doc)
-            
-            print(f"📍 Inserting at index: {safe_index}")
-            
-            # Build professionally formatted requests
-            requests = self._build_formatted_requests(safe_index, doc_data)
-            
-            print(f"📦 Generated {len(requests)} requests")
-            
-            # Execute batch update
-            result = self.service.documents().batchUpdate(
-                documentId=doc_id, 
-                body={"requests": requests}
-            ).execute()
-            
-            print("✅ Documentation written successfully!")
-            return True
+            for attempt in range(2):
+                # Get document and find safe insertion point
+                cursor, _, fetched = self._docs.get(doc_id, refresh=attempt > 0)
+                safe_index = cursor.insertion_point
+                
+                print(f"📍 Inserting at index: {safe_index}")
+                
+                # Build professionally formatted requests
+                requests = self._build_formatted_requests(safe_index, doc_data)
+                
+                print(f"📦 Generated {len(requests)} requests")
+                
+                body = {"requests": requests}
+                write_control = self._docs.write_control(doc_id)
+                if write_control:
+                    body["writeControl"] = write_control
+                
+                # Execute batch update
+                try:
+                    result = self.service.documents().batchUpdate(
+                        documentId=doc_id, 
+                        body=body
+                    ).execute()
+                except HttpError as e:
+                    # A cached revision is stale if the doc was edited
+                    # elsewhere; refetch once before giving up. Any other
+                    # error may have been applied, so it is not retried
+                    if fetched or not _is_revision_conflict(e):
+                        raise
+                    print("🔄 Document changed, refreshing insertion point...")
+                    continue
+                
+                self._docs.record_write(doc_id, result, inserted_length(requests))
+                print("✅ Documentation written successfully!")
+                return True
             
         except HttpError as e:
+            self._docs.invalidate(doc_id)
             print(f"❌ Docs API Error: {e.resp['status']} - {e.content}")
             return False
         except Exception as e:
+            self._docs.invalidate(doc_id)
             print(f"❌ Error: {e}")
             import traceback
             traceback.print_exc()
             return False
     
+    async def awrite_daily_entry(self, doc_id: str, doc_data: Dict) -> bool:
+        """Async write_daily_entry, run off the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.write_daily_entry, doc_id, doc_data)
+    
     def _build_formatted_requests(self, start_index: int, doc_data: Dict) -> List[Dict]:
         """Build document content as single insertion to avoid index errors"""
         data = doc_data["structured"]
@@ -134,7 +176,7 @@ Generated by Agentic AI Documentation Assistant
             },
             {
                 "insertPageBreak": {
-                    "location": {"index": start_index + len(content)}
+                    "location": {"index": start_index + calculate_content_length(content)}
                 }
             }
         ]
@@ -1,28 +1,202 @@
 import google.generativeai as genai
-from typing import Dict, List, Any
+from google.generativeai import caching
+from google.api_core.exceptions import InvalidArgument, ResourceExhausted, ServerError
+from pydantic import BaseModel, Field, ValidationError
+from tenacity import retry, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
+from typing import Dict, List, Any, Tuple, Optional, Callable
+import asyncio
+import copy
+import functools
+import hashlib
+import ijson
 import json
+import logging
+import os
+import tempfile
+import threading
+import time
 import re
-from datetime import datetime
-from config import *
+from datetime import datetime, timedelta
+from types import MappingProxyType
+import config
+from utils.cache import ResponseCache
+from utils import fastjson
+
+logger = logging.getLogger("docify.gemini")
+
+_JSON_DECODER = json.JSONDecoder()
+# Gemini calls are retried on rate limits and server errors, waiting as
+# long as the API asks for when it says, exponential backoff otherwise
+_MAX_ATTEMPTS = 5
+_BACKOFF = wait_exponential_jitter(initial=1, max=30)
+# Terminal states of a Gemini batch job
+_BATCH_DONE_STATES = {
+    "JOB_STATE_SUCCEEDED", "JOB_STATE_FAILED", "JOB_STATE_CANCELLED", "JOB_STATE_EXPIRED"
+}
+def _retry_after(exc: BaseException) -> Optional[float]:
+    """Delay the API asked for, from a Retry-After header or gRPC RetryInfo"""
+    response = getattr(exc, "response", None)
+    header = getattr(response, "headers", {}).get("retry-after") if response is not None else None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    for detail in getattr(exc, "details", None) or ():
+        delay = getattr(detail, "retry_delay", None)
+        if delay is not None:
+            return delay.seconds + delay.nanos / 1e9
+    return None
+
+def _wait(retry_state) -> float:
+    delay = _retry_after(retry_state.outcome.exception())
+    return min(delay, 60.0) if delay is not None else _BACKOFF(retry_state)
+
+def _log_retry(retry_state):
+    logger.warning("⏳ Gemini call failed (%s), retrying in %.1fs...",
+                   retry_state.outcome.exception(), retry_state.next_action.sleep)
+
+_retry_gemini = retry(
+    stop=stop_after_attempt(_MAX_ATTEMPTS),
+    wait=_wait,
+    retry=retry_if_exception_type((ResourceExhausted, ServerError)),
+    before_sleep=_log_retry,
+    reraise=True
+)
+
+# Top-level string fields reported to on_field while a response streams in
+_STREAMED_FIELDS = frozenset({"title", "summary", "task_description"})
+# Opening ```/```json fence or closing ``` fence
+_MARKDOWN_FENCE = re.compile(r'^```(?:json)?\s*|\s*```$')
+
+# Response schema, enforced by Gemini's structured output; the field
+# descriptions are sent with it, so the prompt carries no JSON example
+class TechnicalImplementation(BaseModel):
+    approach: str = Field(description="Methodology used")
+    technologies: List[str]
+    code_snippets: List[str] = Field(description="Implementation or configuration details")
+    architecture_decisions: str = Field(description="Key decisions made")
+
+class Challenge(BaseModel):
+    challenge: str = Field(description="Specific challenge description")
+    solution: str = Field(description="How it was resolved")
+    learning: str = Field(description="Key takeaway")
+
+class MetricsTable(BaseModel):
+    headers: List[str] = Field(description="Column headers: Metric, Value, Impact")
+    rows: List[List[str]] = Field(description="One row per metric, e.g. Task Status, Time Invested, Quality")
+
+class WorkLog(BaseModel):
+    title: str = Field(description="Work Log - [Date as YYYY-MM-DD] - [Descriptive Title]")
+    summary: str = Field(description="2-3 sentence executive summary")
+    task_description: str = Field(description="Detailed explanation of the task")
+    key_achievements: List[str] = Field(description="About 3 achievements with details")
+    technical_implementation: TechnicalImplementation
+    challenges_faced: List[Challenge]
+    metrics_and_results: MetricsTable
+    next_steps: List[str] = Field(description="About 3 concrete action items")
+    tags: List[str]
+
+# Static part of the documentation prompt; the per-task details follow it
+# so the prefix can be served from Gemini's context cache
+_PROMPT_PREFIX = """You are a technical documentation assistant for AI/ML Engineer Lakshmi Naresh Chikkala.
+
+Generate a DETAILED and PROFESSIONAL work log entry based on the task information at the end of this prompt.
+
+Create documentation that includes:
+1. A clear explanation of WHAT the task was about
+2. WHY this work was needed (business/technical justification)
+3. HOW you approached and solved it (methodology)
+4. Specific technical implementations or configurations
+5. Real challenges you might have faced doing this work
+6. Concrete next steps
+
+Make it realistic, detailed, and technical. Keep achievements and challenges concise but informative."""
+
+# Per-task part of the prompt, appended to the prefix
+_PROMPT_TASK = """
+
+**Task/Topic:** {topic}
+**Additional Details:** {details}
+**Date:** {timestamp}"""
+
+# Fallback entry used when generation or parsing fails; the None fields
+# are filled in per task by _create_fallback_with_ai_content
+_FALLBACK_SKELETON = MappingProxyType({
+    "structured": {
+        "title": None,
+        "summary": None,
+        "task_description": None,
+        "key_achievements": [
+            None,
+            "Completed required configurations and implementations",
+            "Validated and tested the solution"
+        ],
+        "technical_implementation": {
+            "approach": "Systematic implementation following best practices",
+            "technologies": ["Python", "ML/AI Tools", "Configuration Management"],
+            "code_snippets": [None, "Applied optimization techniques"],
+            "architecture_decisions": "Followed modular design principles and industry standards"
+        },
+        "challenges_faced": [
+            {
+                "challenge": "Technical complexity and integration issues",
+                "solution": "Broke down into manageable components and tested incrementally",
+                "learning": "Importance of systematic approach and thorough testing"
+            }
+        ],
+        "metrics_and_results": {
+            "headers": ["Metric", "Value", "Impact"],
+            "rows": [
+                ["Task Status", "Completed", "Ready for next phase"],
+                ["Time Invested", "As planned", "On schedule"],
+                ["Quality", "High", "Meets requirements"]
+            ]
+        },
+        "next_steps": [
+            "Test implementation in staging environment",
+            "Document configuration for team reference",
+            "Plan integration with downstream systems"
+        ],
+        "tags": ["configuration", "implementation", "ml-engineering"]
+    }
+})
+
+# Lifetime of the cached prompt prefix
+_CONTEXT_CACHE_TTL = timedelta(hours=1)
+# Smallest prompt (in tokens) each model accepts for a context cache
+_CONTEXT_CACHE_MIN_TOKENS = {"gemini-2.5-flash": 1024, "gemini-2.5-pro": 4096}
+_CONTEXT_CACHE_DEFAULT_MIN_TOKENS = 4096
+# Wait before trying to create the cache again after a transient failure
+_CONTEXT_CACHE_RETRY_SECONDS = 60
+
+# cache_path default: config.CACHE_PATH, read when the agent is created
+_CONFIGURED_CACHE = object()
 
 class GeminiAgent:
-    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash"):
+    def __init__(self, api_key: str, model_name: str = "gemini-1.5-flash",
+                 cache_path: Optional[str] = _CONFIGURED_CACHE):
         """
         Initialize the Gemini agent for work documentation
         
         Args:
             api_key: Your Google Gemini API key
             model_name: Model to use (default: gemini-1.5-flash)
+            cache_path: SQLite file for cached responses (default:
+                config.CACHE_PATH), None to disable
         """
         genai.configure(api_key=api_key)
+        self.api_key = api_key
+        self.model_name = model_name
         
         # Configure generation settings for better JSON output
-        generation_config = {
+        self.generation_config = generation_config = {
             "temperature": 0.7,
             "top_p": 0.95,
             "top_k": 40,
             "max_output_tokens": 8192,  # Increased from 2048 to handle longer responses
-            "response_mime_type": "application/json"  # Force JSON response
+            "response_mime_type": "application/json",  # Force JSON response
+            "response_schema": WorkLog
         }
         
         self.model = genai.GenerativeModel(
@@ -30,217 +204,408 @@ class GeminiAgent:
             generation_config=generation_config
         )
         
-    def generate_work_documentation(self, task_topic: str, details: str = "") -> Dict[str, Any]:
+        # Object decoded by the last successful _extract_and_fix_json call
+        self._last_parsed = None
+        
+        if cache_path is _CONFIGURED_CACHE:
+            cache_path = config.CACHE_PATH
+        self.cache = ResponseCache(cache_path, config.CACHE_TTL_SECONDS) if cache_path else None
+        
+        # Context cache for the static prompt prefix, see _context_model().
+        # Every token covers at least one character, so a prefix shorter
+        # than the minimum token count can never be cached
+        self._context_min_tokens = _CONTEXT_CACHE_MIN_TOKENS.get(model_name, _CONTEXT_CACHE_DEFAULT_MIN_TOKENS)
+        self._context_caching = len(_PROMPT_PREFIX) >= self._context_min_tokens
+        self._prefix_counted = False
+        self._context_lock = threading.Lock()
+        self._cached_model = None
+        self._cached_until = 0.0
+        
+    def generate_work_documentation(self, task_topic: str, details: str = "",
+                                    on_field: Optional[Callable[[str, str], None]] = None) -> Dict[str, Any]:
         """
         Generate comprehensive technical documentation for your work
         
         Args:
             task_topic: Main topic/task you worked on
             details: Additional details about what you did
+            on_field: Called with (name, value) for title, summary and
+                task_description as soon as each is streamed in
             
         Returns:
-            Dictionary with raw_content, structured data, and timestamp
+            Dictionary with raw_content, structured data, timestamp and,
+            for fresh responses, token usage
         """
         timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cache_key = self._cache_key(task_topic, details, timestamp)
+        cached = self._cached_result(cache_key, timestamp)
+        if cached:
+            return cached
         
-        # Enhanced prompt for better documentation generation
-        prompt = f"""You are a technical documentation assistant for AI/ML Engineer Lakshmi Naresh Chikkala.
-
-Generate a DETAILED and PROFESSIONAL work log entry based on the following information:
-
-**Task/Topic:** {task_topic}
-**Additional Details:** {details if details else "Not provided"}
-**Date:** {timestamp}
-
-Create documentation that includes:
-1. A clear explanation of WHAT the task was about
-2. WHY this work was needed (business/technical justification)
-3. HOW you approached and solved it (methodology)
-4. Specific technical implementations or configurations
-5. Real challenges you might have faced doing this work
-6. Concrete next steps
-
-CRITICAL: Return ONLY a valid JSON object. Do NOT include markdown formatting, code blocks, or any text outside the JSON.
-
-JSON Structure Required:
-
-{{
-    "title": "Work Log - {timestamp.split()[0]} - [Descriptive Title]",
-    "summary": "2-3 sentence executive summary",
-    "task_description": "Detailed explanation of the task",
-    "key_achievements": [
-        "Achievement 1 with details",
-        "Achievement 2 with details",
-        "Achievement 3 with details"
-    ],
-    "technical_implementation": {{
-        "approach": "Methodology used",
-        "technologies": ["tech1", "tech2", "tech3"],
-        "code_snippets": ["Implementation detail 1", "Configuration detail 2"],
-        "architecture_decisions": "Key decisions made"
-    }},
-    "challenges_faced": [
-        {{
-            "challenge": "Specific challenge description",
-            "solution": "How it was resolved",
-            "learning": "Key takeaway"
-        }}
-    ],
-    "metrics_and_results": {{
-        "headers": ["Metric", "Value", "Impact"],
-        "rows": [
-            ["Task Status", "Completed", "Ready for deployment"],
-            ["Time Invested", "4 hours", "Within estimate"],
-            ["Quality", "High", "Meets standards"]
-        ]
-    }},
-    "next_steps": [
-        "Action item 1",
-        "Action item 2",
-        "Action item 3"
-    ],
-    "tags": ["ml-engineering", "deployment", "optimization"]
-}}
-
-Make it realistic, detailed, and technical. Keep achievements and challenges concise but informative."""
-
         try:
-            print(f"🤖 Generating documentation for: {task_topic}")
-            print(f"⏳ Calling Gemini API...")
+            logger.info("🤖 Generating documentation for: %s", task_topic)
+            logger.debug("⏳ Calling Gemini API...")
             
             # Generate content from Gemini
-            response = self.model.generate_content(prompt)
-            raw_text = response.text.strip()
+            model, prompt = self._model_and_prompt(task_topic, details, timestamp)
+            response, raw_text = self._stream_model(model, prompt, on_field)
+            result = self._store_result(
+                cache_key, self._parse_response(raw_text, task_topic, details, timestamp)
+            )
+            result["usage"] = self._usage(response)
+            return result
+            
+        except Exception as e:
+            logger.error("❌ API Error: %s", e)
+            return self._create_fallback_with_ai_content(task_topic, details, timestamp, None)
+    
+    async def agenerate_work_documentation(self, task_topic: str, details: str = "") -> Dict[str, Any]:
+        """Async generate_work_documentation, backing off when rate limited"""
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        cache_key = self._cache_key(task_topic, details, timestamp)
+        cached = self._cached_result(cache_key, timestamp)
+        if cached:
+            return cached
+        
+        try:
+            logger.info("🤖 Generating documentation for: %s", task_topic)
+            
+            model, prompt = await asyncio.get_running_loop().run_in_executor(
+                None, self._model_and_prompt, task_topic, details, timestamp
+            )
+            response = await self._acall_model(model, prompt)
+            result = self._store_result(
+                cache_key, self._parse_response(response.text, task_topic, details, timestamp)
+            )
+            result["usage"] = self._usage(response)
+            return result
+            
+        except Exception as e:
+            logger.error("❌ API Error: %s", e)
+            return self._create_fallback_with_ai_content(task_topic, details, timestamp, None)
+    
+    async def generate_batch(self, items: List[Tuple[str, str]], max_concurrency: int = 5) -> List[Dict[str, Any]]:
+        """
+        Generate documentation for several topics concurrently
+        
+        Args:
+            items: (task_topic, details) pairs
+            max_concurrency: Gemini calls allowed in flight at once
             
-            print(f"✅ Received response from Gemini")
-            print(f"📝 Response length: {len(raw_text)} characters")
+        Returns:
+            Results in the same order as items
+        """
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def run(task_topic: str, details: str) -> Dict[str, Any]:
+            async with semaphore:
+                return await self.agenerate_work_documentation(task_topic, details)
+        
+        return await asyncio.gather(*(run(topic, details) for topic, details in items))
+    
+    async def generate_work_documentation_batch(self, items: List[Tuple[str, str]],
+                                                poll_interval: float = 10.0) -> List[Dict[str, Any]]:
+        """
+        Generate documentation for many topics through Gemini Batch Mode
+        
+        Batch jobs are billed at half the interactive price but can take
+        minutes to hours, so this suits backlogs rather than live use.
+        Requires the google-genai SDK, which needs Python 3.9+.
+        
+        Args:
+            items: (task_topic, details) pairs
+            poll_interval: Initial delay between job status checks
             
-            # Since response_mime_type is set to application/json, the response should be pure JSON
-            # Try to parse it directly first
+        Returns:
+            Results in the same order as items; entries the job did not
+            return use the fallback structure
+        """
+        from google import genai as genai_sdk
+        
+        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        client = genai_sdk.Client(api_key=self.api_key)
+        loop = asyncio.get_running_loop()
+        
+        # Batch requests are plain JSON, so the schema goes in as JSON Schema
+        batch_config = {k: v for k, v in self.generation_config.items() if k != "response_schema"}
+        batch_config["response_json_schema"] = WorkLog.model_json_schema()
+        
+        # One request per line, keyed by position
+        with tempfile.NamedTemporaryFile("w", suffix=".jsonl", delete=False, encoding="utf-8") as f:
+            for i, (task_topic, details) in enumerate(items):
+                f.write(fastjson.dumps({
+                    "key": str(i),
+                    "request": {
+                        "contents": [{"role": "user", "parts": [{"text": self._build_prompt(task_topic, details, timestamp)}]}],
+                        "generation_config": batch_config
+                    }
+                }) + "\n")
+            path = f.name
+        
+        try:
+            logger.info("📦 Submitting batch of %s topics...", len(items))
+            uploaded = await loop.run_in_executor(
+                None, functools.partial(client.files.upload, file=path, config={"mime_type": "jsonl"})
+            )
+            job = await loop.run_in_executor(
+                None, functools.partial(client.batches.create, model=self.model_name, src=uploaded.name)
+            )
+        finally:
+            os.remove(path)
+        
+        delay = poll_interval
+        while job.state.name not in _BATCH_DONE_STATES:
+            await asyncio.sleep(delay)
+            delay = min(delay * 2, 300)
+            job = await loop.run_in_executor(None, functools.partial(client.batches.get, name=job.name))
+        logger.info("📦 Batch job finished: %s", job.state.name)
+        
+        raw_texts: Dict[int, str] = {}
+        if job.state.name == "JOB_STATE_SUCCEEDED":
+            content = await loop.run_in_executor(
+                None, functools.partial(client.files.download, file=job.dest.file_name)
+            )
+            for line in content.splitlines():
+                if not line.strip():
+                    continue
+                result = fastjson.loads(line)
+                try:
+                    raw_texts[int(result["key"])] = result["response"]["candidates"][0]["content"]["parts"][0]["text"]
+                except (KeyError, IndexError):
+                    logger.error("❌ Batch item %s failed: %s", result.get('key'), result.get('error'))
+        
+        return [
+            self._parse_response(raw_texts[i], task_topic, details, timestamp)
+            if i in raw_texts
+            else self._create_fallback_with_ai_content(task_topic, details, timestamp, None)
+            for i, (task_topic, details) in enumerate(items)
+        ]
+    
+    @_retry_gemini
+    def _open_stream(self, model, prompt: str):
+        """Start a streamed response, retried on rate limits and server errors"""
+        # generate_content fetches the first chunk before returning, so a
+        # retry here never replays anything on_field has already seen
+        return model.generate_content(prompt, stream=True)
+    
+    def _stream_model(self, model, prompt: str, on_field: Optional[Callable[[str, str], None]] = None):
+        """
+        Stream a response, returning it with its full text
+        
+        Chunks are fed to an incremental JSON parser so on_field sees the
+        top-level strings as they arrive rather than after the last token.
+        Only opening the stream is retried; a failure partway through is
+        raised, since a replay would report fields twice.
+        """
+        events = ijson.sendable_list()
+        parser = ijson.parse_coro(events) if on_field else None
+        parts = []
+        
+        response = self._open_stream(model, prompt)
+        for chunk in response:
+            # The terminal chunk can carry only usage metadata
+            if not chunk.parts:
+                continue
+            parts.append(chunk.text)
+            if parser is None:
+                continue
             try:
-                structured_data = json.loads(raw_text)
-                print(f"✅ Successfully parsed JSON directly")
+                parser.send(chunk.text.encode("utf-8"))
+            except ijson.JSONError:
+                # Not streamable JSON; _parse_response deals with the full text
+                parser = None
+                continue
+            for prefix, event, value in events:
+                if event == "string" and prefix in _STREAMED_FIELDS:
+                    on_field(prefix, value)
+            del events[:]
+        
+        return response, "".join(parts)
+    
+    @staticmethod
+    def _usage(response) -> Dict[str, int]:
+        """Token counts from a response's usage metadata"""
+        usage = response.usage_metadata
+        return {
+            "prompt_tokens": usage.prompt_token_count,
+            "cached_tokens": getattr(usage, "cached_content_token_count", 0),
+            "output_tokens": usage.candidates_token_count,
+            "total_tokens": usage.total_token_count
+        }
+    
+    @_retry_gemini
+    async def _acall_model(self, model, prompt: str):
+        """generate_content_async, retried on rate limits and server errors"""
+        return await model.generate_content_async(prompt)
+    
+    def _cache_key(self, task_topic: str, details: str, timestamp: str) -> str:
+        """
+        Cache key for a request
+        
+        The prompt embeds the full timestamp, so the key uses its date
+        instead: the same task documented twice on one day is a hit.
+        """
+        date = timestamp.split()[0]
+        return hashlib.sha256(
+            "\0".join((self.model_name, task_topic, details, date)).encode("utf-8")
+        ).hexdigest()
+    
+    def _cached_result(self, cache_key: str, timestamp: str) -> Optional[Dict[str, Any]]:
+        """Cached result with a fresh timestamp, or None"""
+        if self.cache is None:
+            return None
+        result = self.cache.get(cache_key)
+        if result is None:
+            return None
+        logger.info("⚡ Using cached documentation")
+        result["timestamp"] = timestamp
+        return result
+    
+    def _store_result(self, cache_key: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Cache successful results; fallbacks are retried next time"""
+        if self.cache is not None and result["status"] == "success":
+            self.cache.put(cache_key, result)
+        return result
+    
+    def _build_prompt(self, task_topic: str, details: str, timestamp: str) -> str:
+        """Build the full documentation prompt for one task"""
+        return _PROMPT_PREFIX + self._build_prompt_tail(task_topic, details, timestamp)
+    
+    def _build_prompt_tail(self, task_topic: str, details: str, timestamp: str) -> str:
+        """Per-task part of the prompt, sent after the static prefix"""
+        return _PROMPT_TASK.format(topic=task_topic, details=details or "Not provided", timestamp=timestamp)
+    
+    def _model_and_prompt(self, task_topic: str, details: str, timestamp: str):
+        """Model to call and the prompt to send it, using the cached prefix when possible"""
+        tail = self._build_prompt_tail(task_topic, details, timestamp)
+        cached_model = self._context_model()
+        if cached_model is None:
+            return self.model, _PROMPT_PREFIX + tail
+        return cached_model, tail
+    
+    def _context_model(self):
+        """
+        Model bound to a cached copy of _PROMPT_PREFIX, or None
+        
+        The cache is created on first use and recreated shortly before its
+        TTL runs out. Caching is switched off for good only when the prefix
+        is below the model's minimum cacheable size; other failures send
+        full prompts for a minute and then try again. Keeping the static
+        text first still lets Gemini's implicit prefix caching apply.
+        """
+        with self._context_lock:
+            if not self._context_caching:
+                return None
+            now = time.monotonic()
+            if now < self._cached_until:
+                return self._cached_model
+            try:
+                if not self._prefix_counted:
+                    tokens = self.model.count_tokens(_PROMPT_PREFIX).total_tokens
+                    self._prefix_counted = True
+                    if tokens < self._context_min_tokens:
+                        logger.info("ℹ️  Prompt prefix too small for context caching (%s tokens)", tokens)
+                        self._context_caching = False
+                        return None
+                cached = caching.CachedContent.create(
+                    model=self.model_name,
+                    contents=[_PROMPT_PREFIX],
+                    ttl=_CONTEXT_CACHE_TTL
+                )
+                self._cached_model = genai.GenerativeModel.from_cached_content(
+                    cached_content=cached,
+                    generation_config=self.generation_config
+                )
+                self._cached_until = now + _CONTEXT_CACHE_TTL.total_seconds() - 60
+            except Exception as e:
+                self._cached_model = None
+                # The API's own size check, e.g. if the minimum changed
+                if isinstance(e, InvalidArgument) and "too small" in str(e).lower():
+                    logger.info("ℹ️  Context caching unavailable, sending full prompts: %s", e)
+                    self._context_caching = False
+                else:
+                    logger.warning("⚠️  Context cache creation failed, sending full prompts: %s", e)
+                    self._cached_until = now + _CONTEXT_CACHE_RETRY_SECONDS
+            return self._cached_model
+    
+    def _parse_response(self, raw_text: str, task_topic: str, details: str, timestamp: str) -> Dict[str, Any]:
+        """Turn a Gemini response into a result dict, falling back if it is not JSON"""
+        raw_text = raw_text.strip()
+        
+        logger.debug("✅ Received response from Gemini")
+        logger.debug("📝 Response length: %s characters", len(raw_text))
+        
+        # response_schema makes Gemini return a conforming WorkLog, so
+        # validate it directly; extraction is only for truncated output
+        try:
+            structured_data = WorkLog.model_validate_json(raw_text).model_dump()
+            logger.debug("✅ Successfully parsed JSON directly")
+            
+            return {
+                "raw_content": raw_text,
+                "structured": structured_data,
+                "timestamp": timestamp,
+                "status": "success"
+            }
+        except ValidationError as direct_error:
+            logger.warning("⚠️ Direct JSON parse failed: %s", direct_error)
+            logger.debug("🔍 Attempting JSON extraction...")
+            
+            # Try to extract and fix JSON
+            json_str = self._extract_and_fix_json(raw_text)
+            
+            if json_str:
+                # Already decoded during extraction
+                logger.debug("✅ Successfully parsed extracted JSON")
                 
                 return {
                     "raw_content": raw_text,
-                    "structured": structured_data,
+                    "structured": self._last_parsed,
                     "timestamp": timestamp,
                     "status": "success"
                 }
-            except json.JSONDecodeError as direct_error:
-                print(f"⚠️ Direct JSON parse failed: {direct_error}")
-                print(f"🔍 Attempting JSON extraction...")
-                
-                # Try to extract and fix JSON
-                json_str = self._extract_and_fix_json(raw_text)
-                
-                if json_str:
-                    try:
-                        structured_data = json.loads(json_str)
-                        print(f"✅ Successfully parsed extracted JSON")
-                        
-                        return {
-                            "raw_content": raw_text,
-                            "structured": structured_data,
-                            "timestamp": timestamp,
-                            "status": "success"
-                        }
-                    except json.JSONDecodeError as extract_error:
-                        print(f"❌ Extracted JSON still invalid: {extract_error}")
-                        print(f"📄 Extracted JSON preview: {json_str[:500]}")
-                else:
-                    print(f"❌ JSON extraction failed completely")
-                    print(f"📄 Full response preview: {raw_text[:500]}")
-            
-            # If all parsing failed, use fallback
-            return self._create_fallback_with_ai_content(task_topic, details, timestamp, raw_text)
-            
-        except Exception as e:
-            print(f"❌ API Error: {e}")
-            return self._create_fallback_with_ai_content(task_topic, details, timestamp, None)
+            else:
+                logger.error("❌ JSON extraction failed completely")
+                logger.debug("📄 Full response preview: %s", raw_text[:500])
+        
+        # If all parsing failed, use fallback
+        return self._create_fallback_with_ai_content(task_topic, details, timestamp, raw_text)
     
     def _extract_and_fix_json(self, text: str) -> str:
         """
         Extract JSON from text and attempt to fix common issues
         """
         # Remove markdown code blocks if present
-        cleaned = text.strip()
-        cleaned = re.sub(r'^```json\s*', '', cleaned)
-        cleaned = re.sub(r'^```\s*', '', cleaned)
-        cleaned = re.sub(r'\s*```$', '', cleaned)
-        cleaned = cleaned.strip()
+        cleaned = _MARKDOWN_FENCE.sub('', text.strip()).strip()
+        
+        self._last_parsed = None
         
         # Find the start of JSON
         start_idx = cleaned.find('{')
         if start_idx == -1:
-            print(f"⚠️ No opening brace found")
+            logger.warning("⚠️ No opening brace found")
             return None
         
-        # Find the matching closing brace using brace counting
-        brace_count = 0
-        end_idx = -1
-        in_string = False
-        escape_next = False
-        
-        for i in range(start_idx, len(cleaned)):
-            char = cleaned[i]
-            
-            # Handle escape sequences
-            if escape_next:
-                escape_next = False
-                continue
-            
-            if char == '\\':
-                escape_next = True
-                continue
-            
-            # Track string boundaries
-            if char == '"':
-                in_string = not in_string
-                continue
-            
-            # Count braces only outside strings
-            if not in_string:
-                if char == '{':
-                    brace_count += 1
-                elif char == '}':
-                    brace_count -= 1
-                    if brace_count == 0:
-                        end_idx = i
-                        break
-        
-        if end_idx == -1:
-            print(f"⚠️ No matching closing brace found. Open braces: {brace_count}")
-            
-            # Try to find the last brace and use that
-            last_brace = cleaned.rfind('}')
-            if last_brace != -1:
-                print(f"🔧 Using last brace found at position {last_brace}")
-                end_idx = last_brace
-            else:
-                return None
-        
-        json_str = cleaned[start_idx:end_idx + 1]
-        
-        # Validate the extracted JSON
+        # raw_decode parses the first object starting at start_idx and
+        # reports where it ends, so any trailing text is ignored
         try:
-            json.loads(json_str)
-            print(f"✅ Extracted valid JSON ({len(json_str)} characters)")
-            return json_str
+            self._last_parsed, end_idx = _JSON_DECODER.raw_decode(cleaned, start_idx)
+            logger.debug("✅ Extracted valid JSON (%s characters)", end_idx - start_idx)
+            return cleaned[start_idx:end_idx]
         except json.JSONDecodeError as e:
-            print(f"⚠️ Extracted JSON is invalid: {e}")
-            print(f"🔍 Error at position {e.pos}")
+            logger.warning("⚠️ Extracted JSON is invalid: %s", e)
+            logger.debug("🔍 Error at position %s", e.pos - start_idx)
             
             # Try to fix common issues
             # 1. Truncated strings
             if e.msg.startswith("Unterminated string"):
-                print(f"🔧 Attempting to fix unterminated string...")
+                logger.debug("🔧 Attempting to fix unterminated string...")
                 # Add closing quote before the error position
-                fixed = json_str[:e.pos] + '"' + json_str[e.pos:]
+                fixed = cleaned[start_idx:e.pos] + '"' + cleaned[e.pos:]
                 try:
-                    json.loads(fixed)
-                    return fixed
-                except:
+                    self._last_parsed, end_idx = _JSON_DECODER.raw_decode(fixed)
+                    return fixed[:end_idx]
+                except json.JSONDecodeError:
                     pass
             
             return None
@@ -250,56 +615,26 @@ Make it realistic, detailed, and technical. Keep achievements and challenges con
         """
         Create a structured fallback response with enhanced content
         """
-        print(f"⚠️  Using enhanced fallback structure")
+        logger.warning("⚠️  Using enhanced fallback structure")
         
         # Try to extract useful information from raw response if available
-        summary_text = f"Worked on {task_topic}"
-        if details:
-            summary_text += f": {details}"
+        summary_text = f"Worked on {task_topic}: {details}" if details else f"Worked on {task_topic}"
         
         if raw_response:
             # Try to extract some useful content from the raw response
-            summary_text = raw_response[:200] + "..." if len(raw_response) > 200 else raw_response
+            summary_text = f"{raw_response[:200]}..." if len(raw_response) > 200 else raw_response
+        
+        # Fresh copy, so callers can edit the result without touching the template
+        structured = copy.deepcopy(_FALLBACK_SKELETON["structured"])
+        structured["title"] = f"Work Log - {timestamp.split()[0]} - {task_topic}"
+        structured["summary"] = summary_text
+        structured["task_description"] = f"Task involved: {task_topic}. {details if details else 'Implementation and configuration work completed.'}"
+        structured["key_achievements"][0] = f"Successfully worked on {task_topic}"
+        structured["technical_implementation"]["code_snippets"][0] = f"Implemented {task_topic} configurations"
         
         return {
             "raw_content": raw_response if raw_response else f"Work Log: {task_topic} - {details}\nProgress made on {timestamp}",
-            "structured": {
-                "title": f"Work Log - {timestamp.split()[0]} - {task_topic}",
-                "summary": summary_text,
-                "task_description": f"Task involved: {task_topic}. {details if details else 'Implementation and configuration work completed.'}",
-                "key_achievements": [
-                    f"Successfully worked on {task_topic}",
-                    f"Completed required configurations and implementations",
-                    f"Validated and tested the solution"
-                ],
-                "technical_implementation": {
-                    "approach": "Systematic implementation following best practices",
-                    "technologies": ["Python", "ML/AI Tools", "Configuration Management"],
-                    "code_snippets": [f"Implemented {task_topic} configurations", "Applied optimization techniques"],
-                    "architecture_decisions": "Followed modular design principles and industry standards"
-                },
-                "challenges_faced": [
-                    {
-                        "challenge": "Technical complexity and integration issues",
-                        "solution": "Broke down into manageable components and tested incrementally",
-                        "learning": "Importance of systematic approach and thorough testing"
-                    }
-                ],
-                "metrics_and_results": {
-                    "headers": ["Metric", "Value", "Impact"],
-                    "rows": [
-                        ["Task Status", "Completed", "Ready for next phase"],
-                        ["Time Invested", "As planned", "On schedule"],
-                        ["Quality", "High", "Meets requirements"]
-                    ]
-                },
-                "next_steps": [
-                    "Test implementation in staging environment",
-                    "Document configuration for team reference",
-                    "Plan integration with downstream systems"
-                ],
-                "tags": ["configuration", "implementation", "ml-engineering"]
-            },
+            "structured": structured,
             "timestamp": timestamp,
             "status": "fallback"
         }
@@ -307,8 +642,10 @@ Make it realistic, detailed, and technical. Keep achievements and challenges con
 
 # Example usage
 if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    
     # Initialize agent
-    agent = GeminiAgent(api_key=GEMINI_API_KEY)
+    agent = GeminiAgent(api_key=config.GEMINI_API_KEY)
     
     # Generate documentation
     result = agent.generate_work_documentation(
@@ -320,7 +657,7 @@ if __name__ == "__main__":
     print("\n" + "="*80)
     print("📄 GENERATED DOCUMENTATION")
     print("="*80)
-    print(json.dumps(result["structured"], indent=2))
+    print(fastjson.dumps(result["structured"], indent=True))
     print("\n" + "="*80)
     print(f"⏰ Generated at: {result['timestamp']}")
     print(f"✅ Status: {result['status']}")
\ No newline at end of file
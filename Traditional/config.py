@@ -1,18 +1,42 @@
 # Configuration & secrets
+import functools
 import os
 from dotenv import load_dotenv
 
-load_dotenv()
+@functools.lru_cache(maxsize=None)
+def _load():
+    """Read .env once, on first access to an environment-backed setting"""
+    load_dotenv()
+    return os.environ
+
+# Environment-backed settings, resolved lazily by __getattr__ below:
+# name -> (environment variable, default)
+_ENV_SETTINGS = {
+    # Google Docs
+    "SERVICE_ACCOUNT_FILE": ("SERVICE_ACCOUNT_FILE", "/content/doc-bee-cec8fb727916.json"),
+    "DOC_ID": ("DOC_ID", "1dQ50-UzJASiJUDcmymfpP3hoiiZptaP-SolMaIBPhMY"),
+    # Gemini API
+    "GEMINI_API_KEY": ("GEMINI_API_KEY", None),
+    # Response cache (SQLite)
+    "CACHE_PATH": ("DOCIFY_CACHE_PATH", ".docify_cache.sqlite3"),
+}
+
+def __getattr__(name):
+    try:
+        env_var, default = _ENV_SETTINGS[name]
+    except KeyError:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}") from None
+    return _load().get(env_var, default)
 
 # Google Docs
-SERVICE_ACCOUNT_FILE = os.getenv("SERVICE_ACCOUNT_FILE", "/content/doc-bee-cec8fb727916.json")
-DOC_ID = os.getenv("DOC_ID", "1dQ50-UzJASiJUDcmymfpP3hoiiZptaP-SolMaIBPhMY")
 SCOPES = ["https://www.googleapis.com/auth/documents"]
 
 # Gemini API
-GEMINI_API_KEY = os.getenv("GEMINI_API_KEY")
 MODEL_NAME = "gemini-2.5-flash"
 
+# Response cache entries are keyed by day, so one day is enough
+CACHE_TTL_SECONDS = 24 * 60 * 60
+
 # Doc settings
 FULL_NAME = "Lakshmi Naresh Chikkala"
 SURNAME = "Chikkala"
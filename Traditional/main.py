@@ -1,15 +1,29 @@
 # Entry point & CLI
-from config import *
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from typing import Optional, TextIO, Tuple
+import config
 from agents.gemini_agent import GeminiAgent
 from agents.docs_agent import DocsAgent
 
+def configure_logging():
+    """Send docify log records to stderr at DOCIFY_LOG_LEVEL (default INFO)"""
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    logger = logging.getLogger("docify")
+    logger.addHandler(handler)
+    logger.setLevel(os.getenv("DOCIFY_LOG_LEVEL", "INFO").upper())
+
 def main():
     print("🤖 Agentic AI Documentation Assistant")
     print("=" * 50)
     
     # Initialize agents
-    gemini = GeminiAgent(GEMINI_API_KEY, MODEL_NAME)
-    docs = DocsAgent(SERVICE_ACCOUNT_FILE, SCOPES)
+    gemini = GeminiAgent(config.GEMINI_API_KEY, config.MODEL_NAME)
+    docs = DocsAgent(config.SERVICE_ACCOUNT_FILE, config.SCOPES)
 
     print(f"📧 Service Account: {docs.sa_email}")
     print("Share your Google Doc with this email!")
@@ -24,16 +38,100 @@ def main():
         print("🧠 Generating documentation...")
         
         # Step 1: Generate content
-        doc_data = gemini.generate_work_documentation(topic, details)
+        doc_data = gemini.generate_work_documentation(
+            topic, details, on_field=lambda name, value: print(f"  ✏️  {name}: {value}")
+        )
         print(doc_data)
         # Step 2: Write to Docs
         print("📄 Writing to Google Docs...")
-        success = docs.write_daily_entry(DOC_ID, doc_data)
+        success = docs.write_daily_entry(config.DOC_ID, doc_data)
         
         if success:
             print("🎉 Daily documentation complete!")
         else:
             print("❌ Failed to write to Docs. Check permissions.")
 
+def _parse_task(line: str) -> Tuple[str, str]:
+    """Split a "topic" or "topic | details" line"""
+    topic, _, details = line.partition("|")
+    return topic.strip(), details.strip()
+
+def run_batch(path: str):
+    """Document every task in a file through Gemini Batch Mode"""
+    # One task per line: "topic" or "topic | details"
+    with open(path, encoding="utf-8") as f:
+        items = [_parse_task(line) for line in f if line.strip()]
+    
+    gemini = GeminiAgent(config.GEMINI_API_KEY, config.MODEL_NAME)
+    docs = DocsAgent(config.SERVICE_ACCOUNT_FILE, config.SCOPES)
+    
+    print(f"🧠 Generating documentation for {len(items)} tasks in batch mode...")
+    results = asyncio.run(gemini.generate_work_documentation_batch(items))
+    
+    print("📄 Writing to Google Docs...")
+    written = sum(docs.write_daily_entry(config.DOC_ID, doc_data) for doc_data in results)
+    print(f"🎉 Wrote {written}/{len(results)} entries")
+
+async def _read_tasks(queue: asyncio.Queue, source: TextIO, jobs: int):
+    """Feed tasks from source into the queue, then one stop marker per worker"""
+    while True:
+        line = await asyncio.get_running_loop().run_in_executor(None, source.readline)
+        if not line:
+            break
+        if line.strip():
+            await queue.put(_parse_task(line))
+    for _ in range(jobs):
+        await queue.put(None)
+
+async def _worker(queue: asyncio.Queue, gemini: GeminiAgent, docs: DocsAgent) -> int:
+    """Generate and write queued tasks until the stop marker; returns entries written"""
+    written = 0
+    while (task := await queue.get()) is not None:
+        topic, details = task
+        print(f"🧠 Generating documentation: {topic}")
+        doc_data = await gemini.agenerate_work_documentation(topic, details)
+        if await docs.awrite_daily_entry(config.DOC_ID, doc_data):
+            written += 1
+        else:
+            print(f"❌ Failed to write '{topic}' to Docs. Check permissions.")
+    return written
+
+async def amain(source: TextIO, jobs: int = 8):
+    """
+    Document every task read from source, one "topic | details" per line
+    
+    Up to `jobs` Gemini calls run at once; Docs writes go one at a time
+    because entries share the document's insertion cursor.
+    """
+    gemini = GeminiAgent(config.GEMINI_API_KEY, config.MODEL_NAME)
+    docs = DocsAgent(config.SERVICE_ACCOUNT_FILE, config.SCOPES)
+    
+    queue: asyncio.Queue[Optional[Tuple[str, str]]] = asyncio.Queue(maxsize=jobs * 2)
+    producer = asyncio.create_task(_read_tasks(queue, source, jobs))
+    workers = [asyncio.create_task(_worker(queue, gemini, docs)) for _ in range(jobs)]
+    
+    await producer
+    written = sum(await asyncio.gather(*workers))
+    print(f"🎉 Wrote {written} entries")
+
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="Agentic AI Documentation Assistant")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="document the tasks in FILE (one 'topic | details' per line) via Gemini Batch Mode (Python 3.9+)")
+    parser.add_argument("--tasks", metavar="FILE",
+                        help="document the tasks in FILE concurrently (default: stdin when it is not a terminal)")
+    parser.add_argument("--jobs", type=int, default=8,
+                        help="number of tasks generated concurrently (default: 8)")
+    args = parser.parse_args()
+    
+    configure_logging()
+    
+    if args.batch:
+        run_batch(args.batch)
+    elif args.tasks:
+        with open(args.tasks, encoding="utf-8") as f:
+            asyncio.run(amain(f, args.jobs))
+    elif not sys.stdin.isatty():
+        asyncio.run(amain(sys.stdin, args.jobs))
+    else:
+        main()
@@ -0,0 +1,106 @@
+# Tests for insertion-point tracking
+
+from unittest.mock import MagicMock
+from utils.page_manager import (DOC_FIELDS, DocCursor, ETaggedDocCache,
+                                calculate_content_length, inserted_length)
+
+def _doc(*paragraph_starts, end=None):
+    """documents().get payload as DOC_FIELDS returns it: a section break, then paragraphs"""
+    content = [{"endIndex": 1, "sectionBreak": {}}]
+    bounds = list(paragraph_starts) + [end or paragraph_starts[-1] + 1]
+    for start, stop in zip(bounds, bounds[1:]):
+        content.append({
+            "startIndex": start,
+            "endIndex": stop,
+            "paragraph": {"paragraphStyle": {"namedStyleType": "NORMAL_TEXT"}}
+        })
+    return {"documentId": "doc", "revisionId": "rev-1", "body": {"content": content}}
+
+# ==================== Length Tests ====================
+
+def test_content_length_counts_utf16_units():
+    """Emoji outside the BMP take two index units"""
+    assert calculate_content_length("abc") == 3
+    assert calculate_content_length("📋 abc") == 6
+
+def test_inserted_length_counts_text_and_page_breaks():
+    """Text counts its UTF-16 length, a page break two"""
+    requests = [
+        {"insertText": {"location": {"index": 1}, "text": "📋 done\n"}},
+        {"insertPageBreak": {"location": {"index": 9}}},
+        {"updateTextStyle": {}}
+    ]
+    assert inserted_length(requests) == 8 + 2
+
+# ==================== DocCursor Tests ====================
+
+def test_cursor_starts_at_last_paragraph():
+    """The insertion point is the start of the last paragraph"""
+    assert DocCursor(_doc(1, 20, 45, end=60)).insertion_point == 45
+
+def test_cursor_empty_document():
+    """A doc with only its section break inserts at index 1"""
+    empty = {"body": {"content": [{"endIndex": 1, "sectionBreak": {}}]}}
+    assert DocCursor(empty).insertion_point == 1
+
+def test_cursor_advances_by_inserted_length():
+    """Each write moves the insertion point past what it inserted"""
+    cursor = DocCursor(_doc(1, 20, 45, end=60))
+    cursor.advance(12)
+    cursor.advance(inserted_length([{"insertText": {"text": "📋 x"}}]))
+    assert cursor.insertion_point == 45 + 12 + 4
+
+# ==================== ETaggedDocCache Tests ====================
+
+def _service(*docs):
+    """Docs service mock whose documents().get() returns docs in turn"""
+    service = MagicMock()
+    service.documents.return_value.get.return_value.execute.side_effect = list(docs)
+    return service
+
+def test_doc_cache_fetches_once():
+    """The first get fetches with the narrow field mask; later gets are local"""
+    service = _service(_doc(1, 45, end=60))
+    docs = ETaggedDocCache(service)
+    
+    cursor, revision_id, fetched = docs.get("doc")
+    assert (cursor.insertion_point, revision_id, fetched) == (45, "rev-1", True)
+    
+    again, _, fetched = docs.get("doc")
+    assert again is cursor and not fetched
+    service.documents.return_value.get.assert_called_once_with(documentId="doc", fields=DOC_FIELDS)
+
+def test_doc_cache_write_control_follows_revisions():
+    """Writes require the cached revision, then the one batchUpdate returns"""
+    docs = ETaggedDocCache(_service(_doc(1, 45, end=60)))
+    docs.get("doc")
+    assert docs.write_control("doc") == {"requiredRevisionId": "rev-1"}
+    
+    docs.record_write("doc", {"writeControl": {"requiredRevisionId": "rev-2"}}, 10)
+    cursor, revision_id, _ = docs.get("doc")
+    assert (cursor.insertion_point, revision_id) == (55, "rev-2")
+    assert docs.write_control("doc") == {"requiredRevisionId": "rev-2"}
+
+def test_doc_cache_without_revision_sends_no_write_control():
+    """A response without writeControl leaves the next write unguarded"""
+    docs = ETaggedDocCache(_service(_doc(1, 45, end=60)))
+    docs.get("doc")
+    docs.record_write("doc", {}, 10)
+    assert docs.write_control("doc") == {}
+
+def test_doc_cache_refresh_and_invalidate_refetch():
+    """refresh=True and invalidate() both discard the local cursor"""
+    edited = _doc(1, 45, 80, end=90)
+    edited["revisionId"] = "rev-9"
+    service = _service(_doc(1, 45, end=60), edited, _doc(1, 30, end=40))
+    docs = ETaggedDocCache(service)
+    docs.get("doc")
+    docs.record_write("doc", {"writeControl": {"requiredRevisionId": "rev-2"}}, 10)
+    
+    cursor, revision_id, fetched = docs.get("doc", refresh=True)
+    assert (cursor.insertion_point, revision_id, fetched) == (80, "rev-9", True)
+    
+    docs.invalidate("doc")
+    cursor, _, fetched = docs.get("doc")
+    assert (cursor.insertion_point, fetched) == (30, True)
+    assert service.documents.return_value.get.call_count == 3
@@ -1,42 +1,74 @@
 # Text/table formatting for Docs API
 from typing import List, Dict, Any
+from utils.page_manager import calculate_content_length
 
-def create_heading_style(text: str, heading_level: int, index: int) -> List[Dict]:
+# Every helper appends its requests to a shared list and returns the index
+# just past the content it inserted, so a whole entry can be composed into
+# a single batchUpdate:
+#
+#     requests = []
+#     index = create_heading_style(requests, "Title", 1, index)
+#     index = create_bullet_list(requests, items, index)
+#
+# The style dicts below are shared between requests rather than rebuilt;
+# requests are only serialized, never mutated. Lengths are in UTF-16 code
+# units, as Docs counts them, so emoji advance the index by two.
+
+DIVIDER_TEXT = "―" * 50 + "\n\n"
+DIVIDER_LENGTH = calculate_content_length(DIVIDER_TEXT)
+DIVIDER_STYLE = {
+    "foregroundColor": {
+        "color": {
+            "rgbColor": {"red": 0.7, "green": 0.7, "blue": 0.7}
+        }
+    }
+}
+
+CODE_STYLE = {
+    "weightedFontFamily": {"fontFamily": "Courier New"},
+    "fontSize": {"magnitude": 10, "unit": "PT"},
+    "backgroundColor": {
+        "color": {
+            "rgbColor": {"red": 0.95, "green": 0.95, "blue": 0.95}
+        }
+    }
+}
+
+def create_heading_style(requests: List[Dict], text: str, heading_level: int, index: int) -> int:
     """Create a styled heading with proper formatting"""
-    return [
-        {
-            "insertText": {
-                "location": {"index": index},
-                "text": text + "\n"
-            }
-        },
-        {
-            "updateParagraphStyle": {
-                "range": {
-                    "startIndex": index,
-                    "endIndex": index + len(text) + 1
-                },
-                "paragraphStyle": {
-                    "namedStyleType": f"HEADING_{heading_level}",
-                    "spaceAbove": {"magnitude": 12, "unit": "PT"},
-                    "spaceBelow": {"magnitude": 6, "unit": "PT"}
-                },
-                "fields": "namedStyleType,spaceAbove,spaceBelow"
-            }
+    end_index = index + calculate_content_length(text) + 1
+    requests.append({
+        "insertText": {
+            "location": {"index": index},
+            "text": text + "\n"
         }
-    ]
+    })
+    requests.append({
+        "updateParagraphStyle": {
+            "range": {
+                "startIndex": index,
+                "endIndex": end_index
+            },
+            "paragraphStyle": {
+                "namedStyleType": f"HEADING_{heading_level}",
+                "spaceAbove": {"magnitude": 12, "unit": "PT"},
+                "spaceBelow": {"magnitude": 6, "unit": "PT"}
+            },
+            "fields": "namedStyleType,spaceAbove,spaceBelow"
+        }
+    })
+    return end_index
 
-def create_styled_text(text: str, index: int, bold: bool = False, 
-                       italic: bool = False, color: Dict = None) -> List[Dict]:
+def create_styled_text(requests: List[Dict], text: str, index: int, bold: bool = False, 
+                       italic: bool = False, color: Dict = None) -> int:
     """Create styled text with formatting options"""
-    requests = [
-        {
-            "insertText": {
-                "location": {"index": index},
-                "text": text
-            }
+    end_index = index + calculate_content_length(text)
+    requests.append({
+        "insertText": {
+            "location": {"index": index},
+            "text": text
         }
-    ]
+    })
     
     text_style = {}
     if bold:
@@ -51,113 +83,99 @@ def create_styled_text(text: str, index: int, bold: bool = False,
             "updateTextStyle": {
                 "range": {
                     "startIndex": index,
-                    "endIndex": index + len(text)
+                    "endIndex": end_index
                 },
                 "textStyle": text_style,
                 "fields": ",".join(text_style.keys())
             }
         })
     
-    return requests
+    return end_index
 
-def create_bullet_list(items: List[str], index: int, bullet_preset: str = "BULLET_DISC_CIRCLE_SQUARE") -> List[Dict]:
+def create_bullet_list(requests: List[Dict], items: List[str], index: int,
+                       bullet_preset: str = "BULLET_DISC_CIRCLE_SQUARE") -> int:
     """Create a formatted bullet list"""
-    requests = []
-    current_index = index
+    if not items:
+        return index
     
-    for item in items:
-        # Insert text
-        requests.append({
-            "insertText": {
-                "location": {"index": current_index},
-                "text": item + "\n"
-            }
-        })
-        
-        # Apply bullet formatting
-        requests.append({
-            "createParagraphBullets": {
-                "range": {
-                    "startIndex": current_index,
-                    "endIndex": current_index + len(item) + 1
-                },
-                "bulletPreset": bullet_preset
-            }
-        })
-        
-        current_index += len(item) + 1
+    # One insert for all items; the bullet preset is applied to every
+    # paragraph the range touches
+    text = "\n".join(items) + "\n"
+    end_index = index + calculate_content_length(text)
     
-    return requests
+    requests.append({
+        "insertText": {
+            "location": {"index": index},
+            "text": text
+        }
+    })
+    requests.append({
+        "createParagraphBullets": {
+            "range": {
+                "startIndex": index,
+                "endIndex": end_index
+            },
+            "bulletPreset": bullet_preset
+        }
+    })
+    
+    return end_index
 
-def create_table(headers: List[str], rows: List[List[str]], index: int) -> List[Dict]:
+def create_table(requests: List[Dict], headers: List[str], rows: List[List[str]], index: int) -> int:
     """Create a formatted table in Google Docs"""
     num_rows = len(rows) + 1  # +1 for header
     num_cols = len(headers)
     
-    requests = [
-        {
-            "insertTable": {
-                "rows": num_rows,
-                "columns": num_cols,
-                "location": {"index": index}
-            }
+    requests.append({
+        "insertTable": {
+            "rows": num_rows,
+            "columns": num_cols,
+            "location": {"index": index}
         }
-    ]
+    })
     
-    return requests
+    # Newline inserted before the table, table start and end markers, and
+    # per row a row marker plus a cell marker and empty paragraph per cell
+    return index + 3 + num_rows * (1 + 2 * num_cols)
 
-def create_divider(index: int) -> List[Dict]:
+def create_divider(requests: List[Dict], index: int) -> int:
     """Create a visual divider line"""
-    return [
-        {
-            "insertText": {
-                "location": {"index": index},
-                "text": "―" * 50 + "\n\n"
-            }
-        },
-        {
-            "updateTextStyle": {
-                "range": {
-                    "startIndex": index,
-                    "endIndex": index + 51
-                },
-                "textStyle": {
-                    "foregroundColor": {
-                        "color": {
-                            "rgbColor": {"red": 0.7, "green": 0.7, "blue": 0.7}
-                        }
-                    }
-                },
-                "fields": "foregroundColor"
-            }
+    requests.append({
+        "insertText": {
+            "location": {"index": index},
+            "text": DIVIDER_TEXT
+        }
+    })
+    requests.append({
+        "updateTextStyle": {
+            "range": {
+                "startIndex": index,
+                # The line and its newline; the blank line stays unstyled
+                "endIndex": index + DIVIDER_LENGTH - 1
+            },
+            "textStyle": DIVIDER_STYLE,
+            "fields": "foregroundColor"
         }
-    ]
+    })
+    return index + DIVIDER_LENGTH
 
-def create_code_block(code: str, index: int) -> List[Dict]:
+def create_code_block(requests: List[Dict], code: str, index: int) -> int:
     """Create a formatted code block"""
-    return [
-        {
-            "insertText": {
-                "location": {"index": index},
-                "text": code + "\n"
-            }
-        },
-        {
-            "updateTextStyle": {
-                "range": {
-                    "startIndex": index,
-                    "endIndex": index + len(code) + 1
-                },
-                "textStyle": {
-                    "weightedFontFamily": {"fontFamily": "Courier New"},
-                    "fontSize": {"magnitude": 10, "unit": "PT"},
-                    "backgroundColor": {
-                        "color": {
-                            "rgbColor": {"red": 0.95, "green": 0.95, "blue": 0.95}
-                        }
-                    }
-                },
-                "fields": "weightedFontFamily,fontSize,backgroundColor"
-            }
+    end_index = index + calculate_content_length(code) + 1
+    requests.append({
+        "insertText": {
+            "location": {"index": index},
+            "text": code + "\n"
+        }
+    })
+    requests.append({
+        "updateTextStyle": {
+            "range": {
+                "startIndex": index,
+                "endIndex": end_index
+            },
+            "textStyle": CODE_STYLE,
+            "fields": "weightedFontFamily,fontSize,backgroundColor"
         }
-    ]
+    })
+    return end_index
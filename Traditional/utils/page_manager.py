@@ -1,5 +1,5 @@
 # Page break & positioning logic
-from typing import Dict, Any, List
+from typing import Dict, Any, List, Optional, Tuple
 
 def get_next_page_start(doc: Dict) -> int:
     """Find start of next available page"""
@@ -53,9 +53,85 @@ def create_section_break(index: int) -> List[Dict]:
     ]
 
 def calculate_content_length(content: str) -> int:
-    """Calculate the length of content for index calculations"""
-    return len(content)
+    """Calculate the length of content for index calculations
+    
+    Docs indexes count UTF-16 code units, so emoji outside the BMP take two.
+    """
+    return len(content.encode("utf-16-le")) // 2
+
+# An inserted page break is followed by a newline
+PAGE_BREAK_LENGTH = 2
+
+def inserted_length(requests: List[Dict]) -> int:
+    """Number of index units a list of insert requests adds to the doc"""
+    total = 0
+    for request in requests:
+        if "insertText" in request:
+            total += calculate_content_length(request["insertText"]["text"])
+        elif "insertPageBreak" in request:
+            total += PAGE_BREAK_LENGTH
+    return total
+
+class DocCursor:
+    """
+    Insertion point of a document, advanced locally after each write
+    
+    Built once from a fetched doc; afterwards the safe insertion point is
+    an attribute read and follow-up entries need no documents().get.
+    """
+    
+    def __init__(self, doc: Dict):
+        self._last_para_start = get_safe_insertion_point(doc)
+    
+    @property
+    def insertion_point(self) -> int:
+        return self._last_para_start
+    
+    def advance(self, inserted: int):
+        """Account for content inserted at the insertion point"""
+        self._last_para_start += inserted
 
 def adjust_index_for_insertion(base_index: int, inserted_length: int) -> int:
     """Adjust index after a previous insertion"""
     return base_index + inserted_length
+
+# Only what DocCursor needs; documents().get returns every style tree by default
+DOC_FIELDS = "documentId,revisionId,body(content(startIndex,endIndex,paragraph(paragraphStyle(namedStyleType))))"
+
+class ETaggedDocCache:
+    """
+    Cursor and revision per document, fetched once and then kept current
+    from batchUpdate responses
+    
+    Writes pass the cached revision as writeControl.requiredRevisionId, so
+    an edit made elsewhere makes the write fail instead of landing at a
+    stale index; the caller then refreshes and retries.
+    """
+    
+    def __init__(self, service):
+        self.service = service
+        self._docs: Dict[str, Tuple[DocCursor, Optional[str]]] = {}
+    
+    def get(self, doc_id: str, refresh: bool = False) -> Tuple[DocCursor, Optional[str], bool]:
+        """(cursor, revision_id, fetched) for a document, fetching it if needed"""
+        fetched = refresh or doc_id not in self._docs
+        if fetched:
+            doc = self.service.documents().get(documentId=doc_id, fields=DOC_FIELDS).execute()
+            self._docs[doc_id] = (DocCursor(doc), doc.get("revisionId"))
+        cursor, revision_id = self._docs[doc_id]
+        return cursor, revision_id, fetched
+    
+    def write_control(self, doc_id: str) -> Dict:
+        """writeControl for the next batchUpdate, empty if the revision is unknown"""
+        revision_id = self._docs[doc_id][1]
+        return {"requiredRevisionId": revision_id} if revision_id else {}
+    
+    def record_write(self, doc_id: str, response: Dict, inserted: int):
+        """Advance the cursor and take the new revision from a batchUpdate response"""
+        cursor, _ = self._docs[doc_id]
+        cursor.advance(inserted)
+        revision_id = response.get("writeControl", {}).get("requiredRevisionId")
+        self._docs[doc_id] = (cursor, revision_id)
+    
+    def invalidate(self, doc_id: str):
+        self._docs.pop(doc_id, None)